@@ -1,10 +1,10 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
+from parquet_stream import resolve_table_path
+from check_duplicates import find_duplicates
 
-def analyze_entity_table():
+def analyze_entity_table(data_dir="mock_data"):
     """
     Detailed analysis of the entity.parquet table.
     """
@@ -13,7 +13,7 @@ def analyze_entity_table():
     print("="*80)
     
     # Read the entity table
-    entity_df = pd.read_parquet("mock_data/entity.parquet")
+    entity_df = pd.read_parquet(resolve_table_path(data_dir, "entity"))
     
     print(f"Table Shape: {entity_df.shape}")
     print(f"Memory Usage: {entity_df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
@@ -183,8 +183,8 @@ def analyze_entity_table():
         else:
             print(f"  {col}: No missing values")
     
-    # Check for duplicate rows
-    duplicates = entity_df.duplicated().sum()
+    # Check for duplicate rows (streamed from the file, hash-based)
+    duplicates = find_duplicates(resolve_table_path(data_dir, "entity"))['duplicates']
     print(f"\nDuplicate rows: {duplicates}")
     
     # Check for duplicate Entity values
@@ -192,7 +192,7 @@ def analyze_entity_table():
     print(f"Duplicate Entity values: {entity_duplicates}")
     
     # Check for duplicate SKU_ID + Warehouse_ID combinations
-    sku_warehouse_duplicates = entity_df.duplicated(subset=['SKU_ID', 'Warehouse_ID']).sum()
+    sku_warehouse_duplicates = find_duplicates(resolve_table_path(data_dir, "entity"), subset=['SKU_ID', 'Warehouse_ID'])['duplicates']
     print(f"Duplicate SKU_ID + Warehouse_ID combinations: {sku_warehouse_duplicates}")
     
     print("\n" + "="*80)
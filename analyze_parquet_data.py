@@ -2,47 +2,64 @@ import pandas as pd
 import os
 from pathlib import Path
 import numpy as np
+from parquet_stream import prefetch, discover_tables
 
-def analyze_parquet_files():
+def _read_parquet_files(tables):
     """
-    Analyze all parquet files in the mock_data directory to understand table relationships.
+    Read each table (file or partitioned directory) in turn, yielding
+    (name, path, df, error) so that one unreadable table does not stop the
+    others.
     """
     
-    # Define the mock_data directory
-    mock_data_dir = Path("mock_data")
+    for table_name, file_path in tables.items():
+        try:
+            yield table_name, file_path, pd.read_parquet(file_path), None
+        except Exception as e:
+            yield table_name, file_path, None, e
+
+def analyze_parquet_files(data_dir="mock_data"):
+    """
+    Analyze all parquet tables in the data directory (single files and
+    partitioned directories) to understand table relationships.
+    """
+    
+    # Define the data directory
+    mock_data_dir = Path(data_dir)
     
     if not mock_data_dir.exists():
-        print("Error: mock_data directory not found!")
+        print(f"Error: {mock_data_dir} directory not found!")
         return
     
-    # Get all parquet files
-    parquet_files = list(mock_data_dir.glob("*.parquet"))
+    # Get all parquet tables, as files or partitioned directories
+    parquet_files = discover_tables(mock_data_dir)
     
     if not parquet_files:
-        print("No parquet files found in mock_data directory!")
+        print(f"No parquet files found in {mock_data_dir} directory!")
         return
     
-    print(f"Found {len(parquet_files)} parquet files:")
-    for file in parquet_files:
-        print(f"  - {file.name}")
+    print(f"Found {len(parquet_files)} parquet tables:")
+    for file in parquet_files.values():
+        print(f"  - {file.name}{'/' if file.is_dir() else ''}")
     print("\n" + "="*80 + "\n")
     
     # Dictionary to store all dataframes and their metadata
     dataframes = {}
     table_info = {}
     
-    # Read each parquet file and extract sample data
-    for file_path in parquet_files:
+    # Read each parquet file and extract sample data. The next file is
+    # read and decoded in the background while the current one is analyzed.
+    for table_name, file_path, df, read_error in prefetch(_read_parquet_files(parquet_files), depth=1):
         try:
             print(f"Analyzing: {file_path.name}")
             print("-" * 50)
             
-            # Read the parquet file
-            df = pd.read_parquet(file_path)
-            dataframes[file_path.stem] = df
+            # Surface read errors from the prefetch thread
+            if read_error is not None:
+                raise read_error
+            dataframes[table_name] = df
             
             # Store basic information
-            table_info[file_path.stem] = {
+            table_info[table_name] = {
                 'file_name': file_path.name,
                 'shape': df.shape,
                 'columns': list(df.columns),
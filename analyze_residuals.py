@@ -1,10 +1,11 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
+from parquet_stream import resolve_table_path
+from check_duplicates import find_duplicates
+from residual_anomalies import detect_anomalies_in_frame
 
-def analyze_residuals_table():
+def analyze_residuals_table(data_dir="mock_data"):
     """
     Detailed analysis of the residuals.parquet table.
     """
@@ -13,7 +14,7 @@ def analyze_residuals_table():
     print("="*80)
     
     # Read the residuals table
-    residuals_df = pd.read_parquet("mock_data/residuals.parquet")
+    residuals_df = pd.read_parquet(resolve_table_path(data_dir, "residuals"))
     
     print(f"Table Shape: {residuals_df.shape}")
     print(f"Memory Usage: {residuals_df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
@@ -189,8 +190,8 @@ def analyze_residuals_table():
         else:
             print(f"  {col}: No missing values")
     
-    # Check for duplicate rows
-    duplicates = residuals_df.duplicated().sum()
+    # Check for duplicate rows (streamed from the file, hash-based)
+    duplicates = find_duplicates(resolve_table_path(data_dir, "residuals"))['duplicates']
     print(f"\nDuplicate rows: {duplicates}")
     
     # Check for impossible values
@@ -203,6 +204,10 @@ def analyze_residuals_table():
     error_consistency = (residuals_df['absolute_error'] == residuals_df['error'].abs()).all()
     print(f"  Absolute error consistency: {'✓' if error_consistency else '✗'}")
     
+    # Per-entity residual spikes (robust z-score of error vs entity median/MAD)
+    anomalies = detect_anomalies_in_frame(residuals_df)
+    print(f"  Residual spikes (|robust z| > 5): {len(anomalies)} across {anomalies['Entity'].nunique()} entities")
+    
     print("\n" + "="*80)
     
     # Summary insights
@@ -1,10 +1,10 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
+from parquet_stream import resolve_table_path
+from correlation_engine import top_correlated_pairs
 
-def analyze_sku_colddirnks_table():
+def analyze_sku_colddirnks_table(data_dir="mock_data"):
     """
     Detailed analysis of the sku-colddirnks.parquet table.
     """
@@ -13,7 +13,7 @@ def analyze_sku_colddirnks_table():
     print("="*80)
     
     # Read the sku-colddirnks table
-    sku_df = pd.read_parquet("mock_data/sku-colddirnks.parquet")
+    sku_df = pd.read_parquet(resolve_table_path(data_dir, "sku-colddirnks"))
     
     print(f"Table Shape: {sku_df.shape}")
     print(f"Memory Usage: {sku_df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
@@ -246,11 +246,9 @@ def analyze_sku_colddirnks_table():
     
     # Find strongest correlations
     print(f"\nStrongest correlations (|r| > 0.5):")
-    for i in range(len(correlation_matrix.columns)):
-        for j in range(i+1, len(correlation_matrix.columns)):
-            corr_val = correlation_matrix.iloc[i, j]
-            if abs(corr_val) > 0.5:
-                print(f"  {correlation_matrix.columns[i]} vs {correlation_matrix.columns[j]}: {corr_val:.3f}")
+    strong_pairs = top_correlated_pairs(correlation_matrix, threshold=0.5)
+    for row in strong_pairs.itertuples(index=False):
+        print(f"  {row.column_a} vs {row.column_b}: {row.r:.3f}")
     
     print("\n" + "="*80)
     
@@ -0,0 +1,237 @@
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import tempfile
+from pathlib import Path
+from parquet_stream import count_rows, iter_parquet_batches, open_dataset, parquet_column_range, parquet_null_count
+
+def plan_key_packing(path, key_columns):
+    """
+    Work out how to pack small integer key columns into a single int64.
+
+    Uses the min/max and null statistics from the parquet footer. Returns a
+    list of (column, offset, shift) tuples, or None if any key is not a
+    non-null integer column with statistics or the combined bit width
+    exceeds 63 bits.
+    """
+
+    packing = []
+    shift = 0
+    for col in key_columns:
+        col_range = parquet_column_range(path, col)
+        if col_range is None or parquet_null_count(path, col) != 0:
+            return None
+        col_min, col_max = col_range
+        if not isinstance(col_min, (int, np.integer)) or isinstance(col_min, bool):
+            return None
+
+        bits = max(int(col_max - col_min).bit_length(), 1)
+        packing.append((col, int(col_min), shift))
+        shift += bits
+        if shift > 63:
+            return None
+
+    return packing
+
+def pack_keys(df, packing):
+    """
+    Pack integer key columns into one int64 per row using a packing plan.
+    """
+
+    codes = np.zeros(len(df), dtype=np.int64)
+    for col, offset, shift in packing:
+        codes |= (df[col].to_numpy(dtype=np.int64) - offset) << shift
+    return codes
+
+def hash_rows(df):
+    """
+    Compute a 64-bit hash per row over all columns of the frame.
+    """
+
+    # -0.0 and 0.0 compare equal in duplicated() but hash differently
+    float_cols = df.select_dtypes(include=["floating"]).columns
+    if len(float_cols) > 0:
+        df = df.assign(**{col: df[col] + 0.0 for col in float_cols})
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def _partition_ids(values, partition_bits):
+    """
+    Assign each value to one of 2**partition_bits partitions using the top
+    bits of a mixed 64-bit hash.
+    """
+
+    if partition_bits == 0:
+        return np.zeros(len(values), dtype=np.int64)
+    mixed = pd.util.hash_array(values)
+    return (mixed >> np.uint64(64 - partition_bits)).astype(np.int64)
+
+def _sorted_duplicates(values):
+    """
+    Sort values and return (duplicate count, values that occur more than once).
+    """
+
+    values = np.sort(values, kind="stable")
+    repeated = values[1:] == values[:-1]
+    duplicate_values = np.unique(values[1:][repeated])
+    return int(repeated.sum()), duplicate_values
+
+def _confirm_duplicates(path, columns, batch_size, row_values, duplicate_values, candidate_rows,
+                        memory_limit_mb, partition_bits):
+    """
+    Exact duplicate count over the rows whose hash repeats.
+
+    Candidate rows are spilled to parquet per hash partition, refining the
+    partitions of the first pass until one partition's rows fit in
+    memory_limit_mb, and each partition is recounted on its own. Equal
+    hashes always share a partition, so the per-partition counts add up.
+    """
+
+    schema = open_dataset(path).schema
+    if columns is not None:
+        schema = pa.schema([schema.field(col) for col in columns])
+    budget_bytes = max(memory_limit_mb * 1024**2, 1)
+
+    with tempfile.TemporaryDirectory(prefix="dupconfirm-") as spill_dir:
+        writers = {}
+        confirm_bits = None
+        in_memory = []
+        try:
+            for batch in iter_parquet_batches(path, columns, batch_size):
+                values = row_values(batch)
+                mask = np.isin(values, duplicate_values)
+                if not mask.any():
+                    continue
+                candidates, values = batch[mask], values[mask]
+
+                if confirm_bits is None:
+                    # Size partitions from the in-memory width of the candidate rows
+                    row_bytes = candidates.memory_usage(deep=True, index=False).sum() / len(candidates)
+                    confirm_bits = partition_bits
+                    while candidate_rows * row_bytes / (1 << confirm_bits) > budget_bytes and confirm_bits < 16:
+                        confirm_bits += 1
+                if confirm_bits == 0:
+                    in_memory.append(candidates)
+                    continue
+
+                part_ids = _partition_ids(values, confirm_bits)
+                for i in np.unique(part_ids):
+                    if i not in writers:
+                        writers[i] = pq.ParquetWriter(Path(spill_dir) / f"part-{i:05d}.parquet", schema)
+                    part = candidates[part_ids == i]
+                    writers[i].write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        if in_memory:
+            return int(pd.concat(in_memory, ignore_index=True).duplicated().sum())
+        return sum(int(pd.read_parquet(Path(spill_dir) / f"part-{i:05d}.parquet").duplicated().sum())
+                   for i in sorted(writers))
+
+def find_duplicates(path, subset=None, memory_limit_mb=256, batch_size=262144, confirm=True):
+    """
+    Detect duplicate rows (or duplicate keys if subset is given) while
+    streaming the table in row batches.
+
+    Each row is reduced to one 64-bit value: the packed key when subset is
+    made of small integer columns, otherwise a row hash. Values are spilled
+    into hash partitions on disk so that each partition can be sorted in
+    memory_limit_mb. Hash matches are confirmed against the actual rows in a
+    second pass when confirm is True, one hash partition at a time, so
+    64-bit collisions cannot inflate the count and memory stays bounded.
+    """
+
+    columns = list(subset) if subset is not None else None
+    total_rows = count_rows(path)
+
+    # Pick the cheapest exact representation available for the keys
+    packing = plan_key_packing(path, columns) if columns else None
+    method = "packed-key" if packing is not None else "row-hash"
+
+    def row_values(batch):
+        if packing is not None:
+            return pack_keys(batch, packing)
+        return hash_rows(batch).view(np.int64)
+
+    # Size partitions so that one of them fits in the memory budget
+    budget_rows = max(int(memory_limit_mb * 1024**2 // 8), 1)
+    partition_bits = 0
+    while (total_rows >> partition_bits) > budget_rows and partition_bits < 16:
+        partition_bits += 1
+    n_partitions = 1 << partition_bits
+
+    duplicates = 0
+    duplicate_values = []
+
+    if n_partitions == 1:
+        values = [row_values(batch) for batch in iter_parquet_batches(path, columns, batch_size)]
+        values = np.concatenate(values) if values else np.empty(0, dtype=np.int64)
+        duplicates, dup_values = _sorted_duplicates(values)
+        duplicate_values.append(dup_values)
+    else:
+        with tempfile.TemporaryDirectory(prefix="dupcheck-") as spill_dir:
+            spill_paths = [Path(spill_dir) / f"part-{i:05d}.bin" for i in range(n_partitions)]
+            spill_files = [open(p, "wb") for p in spill_paths]
+            try:
+                for batch in iter_parquet_batches(path, columns, batch_size):
+                    values = row_values(batch)
+                    part_ids = _partition_ids(values, partition_bits)
+                    order = np.argsort(part_ids, kind="stable")
+                    bounds = np.searchsorted(part_ids[order], np.arange(n_partitions + 1))
+                    for i in range(n_partitions):
+                        if bounds[i + 1] > bounds[i]:
+                            values[order[bounds[i]:bounds[i + 1]]].tofile(spill_files[i])
+            finally:
+                for f in spill_files:
+                    f.close()
+
+            for spill_path in spill_paths:
+                count, dup_values = _sorted_duplicates(np.fromfile(spill_path, dtype=np.int64))
+                duplicates += count
+                duplicate_values.append(dup_values)
+
+    duplicate_values = np.concatenate(duplicate_values)
+    # No repeated value at all is exact even for hashes: equal rows hash equally
+    confirmed = method == "packed-key" or len(duplicate_values) == 0
+
+    # Row hashes can collide, so recount exactly on the candidate rows
+    if confirm and not confirmed:
+        duplicates = _confirm_duplicates(path, columns, batch_size, row_values, duplicate_values,
+                                         duplicates + len(duplicate_values), memory_limit_mb, partition_bits)
+        confirmed = True
+
+    return {
+        "rows": total_rows,
+        "duplicates": duplicates,
+        "method": method,
+        "partitions": n_partitions,
+        "confirmed": confirmed,
+        "duplicate_values": duplicate_values,
+    }
+
+def check_duplicates(path, subset=None, memory_limit_mb=256):
+    """
+    Print a duplicate / key-uniqueness report for a parquet table.
+    """
+
+    label = "rows" if subset is None else f"{' + '.join(subset)} combinations"
+
+    print(f"DUPLICATE CHECK: {Path(path).name} ({label})")
+    print("-" * 50)
+
+    result = find_duplicates(path, subset=subset, memory_limit_mb=memory_limit_mb)
+
+    print(f"Rows scanned: {result['rows']:,}")
+    print(f"Method: {result['method']} ({result['partitions']} partition(s))")
+    print(f"Duplicate {label}: {result['duplicates']}")
+    print(f"Exact: {'✓' if result['confirmed'] else '✗ (64-bit hash match)'}")
+
+    return result
+
+if __name__ == "__main__":
+    check_duplicates("mock_data/residuals.parquet")
+    print()
+    check_duplicates("mock_data/residuals.parquet", subset=["Entity", "Cycle", "Marker", "Horizon"])
+    print()
+    check_duplicates("mock_data/entity.parquet", subset=["SKU_ID", "Warehouse_ID"])
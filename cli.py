@@ -0,0 +1,258 @@
+import time
+
+_CLI_START = time.perf_counter()
+
+import argparse
+import importlib
+import os
+import sys
+
+DEFAULT_DATA_ROOT = os.environ.get("DEMAND_FORECAST_DATA_ROOT", "mock_data")
+
+# Subcommand -> module providing it. Modules are only imported once the
+# subcommand has been chosen, so text-only analyses never load matplotlib
+# and nothing pays for pandas just to print --help.
+SUBCOMMAND_MODULES = {
+    'profile': 'analyze_parquet_data',
+    'residuals': 'analyze_residuals',
+    'entity': 'analyze_entity',
+    'sku': 'analyze_sku_colddirnks',
+    'diagram': 'create_relationship_diagram',
+    'plots': 'plot_sku_observed',
+    'duplicates': 'check_duplicates',
+    'correlate': 'correlation_engine',
+    'simulate': 'simulate_demand',
+    'generate': 'generate_mock_data',
+    'serve': 'query_service',
+    'watch': 'watch_mode',
+    'rolling': 'time_index',
+    'drift': 'drift_monitor',
+    'anomalies': 'residual_anomalies',
+    'coverage': 'coverage_matrix',
+    'triangle': 'error_triangle',
+    'sql': 'sql_mode',
+    'diff': 'snapshot_diff',
+    'shap-top': 'shap_topk',
+}
+
+def _run_profile(module, args):
+    module.analyze_parquet_files(args.data_root)
+
+def _run_residuals(module, args):
+    module.analyze_residuals_table(args.data_root)
+
+def _run_entity(module, args):
+    module.analyze_entity_table(args.data_root)
+
+def _run_sku(module, args):
+    module.analyze_sku_colddirnks_table(args.data_root)
+
+def _run_diagram(module, args):
+    module.create_relationship_diagram(args.output)
+
+def _run_plots(module, args):
+    module.plot_sku_observed_over_time(args.sku_id, args.data_root, args.output)
+
+def _run_duplicates(module, args):
+    from parquet_stream import resolve_table_path
+    module.check_duplicates(resolve_table_path(args.data_root, args.table), args.subset, args.memory_mb)
+
+def _run_correlate(module, args):
+    from parquet_stream import resolve_table_path
+    module.analyze_correlations(resolve_table_path(args.data_root, args.table), args.exclude, args.threshold, args.top)
+
+def _run_simulate(module, args):
+    module.run_demand_simulation(args.data_root, args.scenarios, args.steps, args.seed, args.output)
+
+def _run_generate(module, args):
+    module.generate_mock_data(
+        args.output_dir, data_dir=args.data_root, tables=args.tables, n_cycles=args.cycles,
+        n_horizons=args.horizons, n_partitions=args.partitions, max_workers=args.workers,
+        row_group_size=args.row_group_size, compression=args.compression,
+    )
+
+def _run_serve(module, args):
+    module.serve_queries(args.data_root, args.host, args.port, args.workers)
+
+def _run_watch(module, args):
+    module.watch(args.data_root, args.store, args.interval, args.once)
+
+def _run_rolling(module, args):
+    module.analyze_rolling_accuracy(args.data_root, args.window, args.table, args.store, args.append)
+
+def _run_drift(module, args):
+    module.check_live_predictions(args.data_root, args.reference, args.rebuild, args.update_reference)
+
+def _run_anomalies(module, args):
+    module.analyze_residual_anomalies(args.data_root, args.table, args.threshold, args.method, args.output)
+
+def _run_coverage(module, args):
+    module.analyze_coverage(args.data_root, args.tables)
+
+def _run_triangle(module, args):
+    module.analyze_error_triangle(args.data_root, args.table, args.error_col, args.by_segment, args.store, args.append,
+                                  args.replace)
+
+def _run_sql(module, args):
+    if args.list:
+        module.list_views(args.data_root)
+        return
+    params = dict(item.split("=", 1) for item in args.param)
+    module.run_sql(
+        args.data_root, args.query, args.report, args.report_file,
+        {name: module.parse_param_value(value) for name, value in params.items()},
+        args.threads, args.memory_limit, args.temp_dir, args.output, args.max_rows,
+    )
+
+def _run_diff(module, args):
+    module.report_snapshot_diff(args.old, args.new, args.keys, args.output, not args.no_verify, args.digest_cache)
+
+def _run_shap_top(module, args):
+    module.analyze_top_shap(args.data_root, args.table, args.k, args.output)
+
+def build_parser():
+    """
+    Build the argument parser for all subcommands.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="demand-forecast",
+        description="Analysis tools for the demand forecast mock data tables.",
+    )
+    parser.add_argument("--data-root", default=DEFAULT_DATA_ROOT,
+                        help="directory holding the parquet tables (default: %(default)s, "
+                             "or $DEMAND_FORECAST_DATA_ROOT)")
+    parser.add_argument("--quiet-timing", action="store_true",
+                        help="do not report startup and import times on stderr")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("profile", help="profile every table and look for relationships")
+    subparsers.add_parser("residuals", help="detailed analysis of the residuals table")
+    subparsers.add_parser("entity", help="detailed analysis of the entity table")
+    subparsers.add_parser("sku", help="detailed analysis of the SKU master table")
+
+    sub = subparsers.add_parser("diagram", help="draw the table relationship diagram")
+    sub.add_argument("--output", default="database_relationships.png")
+
+    sub = subparsers.add_parser("plots", help="plot observed demand over time for a SKU")
+    sub.add_argument("sku_id")
+    sub.add_argument("--output", default=None)
+
+    sub = subparsers.add_parser("duplicates", help="streaming duplicate / key-uniqueness check")
+    sub.add_argument("table")
+    sub.add_argument("--subset", nargs="+", default=None, help="key columns (default: whole row)")
+    sub.add_argument("--memory-mb", type=float, default=256)
+
+    sub = subparsers.add_parser("correlate", help="streaming correlation analysis of a table")
+    sub.add_argument("table")
+    sub.add_argument("--exclude", nargs="+", default=['Entity', 'Horizon'])
+    sub.add_argument("--threshold", type=float, default=0.5)
+    sub.add_argument("--top", type=int, default=20)
+
+    sub = subparsers.add_parser("simulate", help="elasticity-driven demand scenario simulation")
+    sub.add_argument("--scenarios", type=int, default=1000)
+    sub.add_argument("--steps", type=int, default=52)
+    sub.add_argument("--seed", type=int, default=0)
+    sub.add_argument("--output", default=None, help="write simulated paths to this parquet file")
+
+    sub = subparsers.add_parser("generate", help="regenerate time-series mock tables at volume")
+    sub.add_argument("output_dir")
+    sub.add_argument("--tables", nargs="+", default=None)
+    sub.add_argument("--cycles", type=int, default=104)
+    sub.add_argument("--horizons", type=int, default=13)
+    sub.add_argument("--partitions", type=int, default=8)
+    sub.add_argument("--workers", type=int, default=None)
+    sub.add_argument("--row-group-size", type=int, default=256_000)
+    sub.add_argument("--compression", default="zstd")
+
+    sub = subparsers.add_parser("serve", help="serve queries from warm in-memory tables")
+    sub.add_argument("--host", default="127.0.0.1")
+    sub.add_argument("--port", type=int, default=8765)
+    sub.add_argument("--workers", type=int, default=8)
+
+    sub = subparsers.add_parser("watch", help="re-run analyses only for tables that changed")
+    sub.add_argument("--store", default=".watch_results", help="persisted result store directory")
+    sub.add_argument("--interval", type=float, default=2.0, help="polling interval in seconds")
+    sub.add_argument("--once", action="store_true", help="refresh once and exit")
+
+    sub = subparsers.add_parser("rolling", help="rolling per-Entity MAE and bias over the last N markers")
+    sub.add_argument("--window", type=int, default=4)
+    sub.add_argument("--table", default="residuals")
+    sub.add_argument("--store", default=None, help="load the index from / save it to this .npz file")
+    sub.add_argument("--append", default=None, help="fold the rows of this parquet file into the index")
+
+    sub = subparsers.add_parser("drift", help="check live-predictions against reference histograms")
+    sub.add_argument("--reference", default="drift_reference.npz", help="persisted reference histograms")
+    sub.add_argument("--rebuild", action="store_true", help="rebuild the reference from residuals history")
+    sub.add_argument("--update-reference", action="store_true", help="fold the live batch into the reference")
+
+    sub = subparsers.add_parser("anomalies", help="per-Entity robust residual spike detection")
+    sub.add_argument("--table", default="full_residuals")
+    sub.add_argument("--threshold", type=float, default=5.0, help="robust z-score threshold")
+    sub.add_argument("--method", choices=["sketch", "exact"], default="sketch")
+    sub.add_argument("--output", default=None, help="write the anomaly table to this parquet file")
+
+    sub = subparsers.add_parser("coverage", help="Entity x Marker x Horizon completeness of the time-series tables")
+    sub.add_argument("--tables", nargs="+", default=None,
+                     help="tables to check (default: residuals, stability, live-predictions, shap_values)")
+
+    sub = subparsers.add_parser("triangle", help="Cycle x Horizon error triangle: horizon decay and vintages")
+    sub.add_argument("--table", default="full_residuals")
+    sub.add_argument("--error-col", default="error", help="signed error column (forecast_change for stability)")
+    sub.add_argument("--by-segment", action="store_true", help="add a Segment axis from segmentation-entity")
+    sub.add_argument("--store", default=None, help="load the triangle from / save it to this .npz file")
+    sub.add_argument("--append", default=None, help="fold the rows of this parquet file into the triangle")
+    sub.add_argument("--replace", action="store_true", help="rebuild triangle cells that --append already holds")
+
+    sub = subparsers.add_parser("sql", help="embedded SQL (DuckDB) over the tables, relationships and saved reports")
+    sub.add_argument("query", nargs="?", default=None, help="ad-hoc SQL query")
+    sub.add_argument("--report", default=None, help="name of a saved report")
+    sub.add_argument("--report-file", default=None, help="run a saved report from a .sql file")
+    sub.add_argument("--param", action="append", default=[], metavar="NAME=VALUE", help="report parameter")
+    sub.add_argument("--list", action="store_true", help="list views and saved reports")
+    sub.add_argument("--threads", type=int, default=None)
+    sub.add_argument("--memory-limit", default=None, help="e.g. 4GB; larger operations spill to --temp-dir")
+    sub.add_argument("--temp-dir", default=None)
+    sub.add_argument("--output", default=None, help="write the result to this parquet file")
+    sub.add_argument("--max-rows", type=int, default=50, help="rows to print")
+
+    sub = subparsers.add_parser("diff", help="keyed diff of two versions of a table, reading only changed row groups")
+    sub.add_argument("old", help="previous version (file or partitioned directory)")
+    sub.add_argument("new", help="new version (file or partitioned directory)")
+    sub.add_argument("--keys", nargs="+", default=None, help="key columns (default: Entity, Cycle, Marker, Horizon)")
+    sub.add_argument("--output", default=None, help="write the (keys..., change) table to this parquet file")
+    sub.add_argument("--no-verify", action="store_true",
+                     help="trust footer fingerprints without content digests (faster, can miss changes)")
+    sub.add_argument("--digest-cache", default=".digest_cache",
+                     help="directory caching content digests of files without them in the footer")
+
+    sub = subparsers.add_parser("shap-top", help="top-k SHAP drivers per row with their building blocks")
+    sub.add_argument("--table", default="full_shap_values")
+    sub.add_argument("-k", type=int, default=5)
+    sub.add_argument("--output", default=None, help="stream the long top-k table to this parquet file")
+
+    return parser
+
+def main(argv=None):
+    """
+    Parse arguments, import only the chosen subcommand's module and run it.
+    """
+
+    args = build_parser().parse_args(argv)
+    startup = time.perf_counter() - _CLI_START
+
+    import_start = time.perf_counter()
+    module_name = SUBCOMMAND_MODULES[args.command]
+    module = importlib.import_module(module_name)
+    import_time = time.perf_counter() - import_start
+
+    if not args.quiet_timing:
+        print(f"[cli] startup {startup * 1000:.1f} ms, "
+              f"imports for '{args.command}' ({module_name}) {import_time * 1000:.1f} ms",
+              file=sys.stderr)
+
+    handler = globals()[f"_run_{args.command.replace('-', '_')}"]
+    handler(module, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from parquet_stream import open_dataset, iter_parquet_batches
+
+class MomentAccumulator:
+    """
+    Streaming, mergeable pairwise first and second moments for a set of
+    columns.
+
+    Missing values are handled like pandas corr(): every pair of columns
+    uses the rows where both are present. So every statistic is a (p, p)
+    matrix over those pairwise-complete rows: the count n, the mean of
+    column i (mean[i, j]), the sum of squares of column i about that mean
+    (sumsq[i, j]) and the co-moment sum((x_i - mean_i)(x_j - mean_j)).
+    Batches are folded in with the pairwise update of Chan et al., which
+    stays numerically stable where the naive sum of squares formula loses
+    precision.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.rows = 0
+        self.complete_rows = 0
+        self.n = np.zeros((p, p), dtype=np.int64)
+        self.mean = np.zeros((p, p))
+        self.sumsq = np.zeros((p, p))
+        self.comoment = np.zeros((p, p))
+
+    def _merge_moments(self, n_b, mean_b, sumsq_b, comoment_b):
+        n = self.n + n_b
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight_b = np.where(n > 0, n_b / n, 0.0)
+        delta = mean_b - self.mean
+        scale = self.n * weight_b
+
+        self.comoment = self.comoment + comoment_b + delta * delta.T * scale
+        self.sumsq = self.sumsq + sumsq_b + delta ** 2 * scale
+        self.mean = self.mean + delta * weight_b
+        self.n = n
+
+    def update(self, values):
+        """
+        Fold a batch (2D array or DataFrame with the accumulator's columns)
+        into the moments. Missing values only drop the pairs they belong to.
+        """
+
+        if isinstance(values, pd.DataFrame):
+            values = values[self.columns].to_numpy(dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        present = ~np.isnan(values)
+        self.rows += len(values)
+        self.complete_rows += int(present.all(axis=1).sum())
+        if not present.any():
+            return self
+
+        # Shift by the column means first; co-moments do not depend on it
+        shift = np.where(present, values, 0.0).sum(axis=0) / np.maximum(present.sum(axis=0), 1)
+        centered = np.where(present, values - shift, 0.0)
+        mask = present.astype(np.float64)
+
+        n_b = mask.T @ mask
+        sums = centered.T @ mask
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_b = np.where(n_b > 0, sums / n_b, 0.0)
+        comoment_b = centered.T @ centered - mean_b * sums.T
+        sumsq_b = (centered ** 2).T @ mask - mean_b * sums
+
+        self._merge_moments(n_b.astype(np.int64), mean_b + shift[:, None], sumsq_b, comoment_b)
+        return self
+
+    def merge(self, other):
+        """
+        Merge another accumulator over the same columns (e.g. from another
+        partition) into this one.
+        """
+
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge accumulators over different columns")
+        self.rows += other.rows
+        self.complete_rows += other.complete_rows
+        self._merge_moments(other.n, other.mean, other.sumsq, other.comoment)
+        return self
+
+    def covariance(self, ddof=1):
+        """
+        Pairwise-complete covariance matrix as a DataFrame; NaN where a
+        pair has too few rows.
+        """
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = np.where(self.n > ddof, self.comoment / (self.n - ddof), np.nan)
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        """
+        Pairwise-complete Pearson correlation matrix as a DataFrame.
+        """
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.comoment / np.sqrt(self.sumsq * self.sumsq.T)
+        corr[self.n == 0] = np.nan
+        np.fill_diagonal(corr, np.where(np.diag(self.sumsq) > 0, 1.0, np.nan))
+        return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=self.columns, columns=self.columns)
+
+def numeric_columns(path, exclude=None):
+    """
+    List the numeric columns of a parquet table from its schema alone.
+    """
+
+    exclude = set(exclude or [])
+    schema = open_dataset(path).schema
+    return [
+        field.name for field in schema
+        if (pa.types.is_integer(field.type) or pa.types.is_floating(field.type))
+        and field.name not in exclude
+    ]
+
+def accumulate_moments(path, columns=None, exclude=None, batch_size=65536, max_workers=None):
+    """
+    Accumulate moments over a parquet file or partitioned directory.
+
+    Each file of a partitioned table is streamed by its own worker and the
+    per-partition accumulators are merged at the end.
+    """
+
+    if columns is None:
+        columns = numeric_columns(path, exclude=exclude)
+
+    def accumulate_file(file_path):
+        acc = MomentAccumulator(columns)
+        for batch in iter_parquet_batches(file_path, columns, batch_size):
+            acc.update(batch)
+        return acc
+
+    files = open_dataset(path).files
+    total = MomentAccumulator(columns)
+    if len(files) == 1:
+        return total.merge(accumulate_file(files[0]))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for acc in executor.map(accumulate_file, files):
+            total.merge(acc)
+    return total
+
+def streaming_correlation(path, columns=None, exclude=None, batch_size=65536):
+    """
+    Correlation matrix of a parquet table computed batch by batch.
+    """
+
+    return accumulate_moments(path, columns, exclude, batch_size).correlation()
+
+def top_correlated_pairs(correlation_matrix, threshold=0.5, top=None):
+    """
+    Extract column pairs with |r| above threshold from the upper triangle of
+    a correlation matrix, strongest first.
+    """
+
+    values = correlation_matrix.to_numpy()
+    rows, cols = np.triu_indices(len(correlation_matrix.columns), k=1)
+    pair_values = values[rows, cols]
+
+    mask = np.abs(pair_values) > threshold
+    rows, cols, pair_values = rows[mask], cols[mask], pair_values[mask]
+
+    order = np.argsort(-np.abs(pair_values), kind="stable")
+    if top is not None:
+        order = order[:top]
+
+    names = np.asarray(correlation_matrix.columns)
+    return pd.DataFrame({
+        'column_a': names[rows[order]],
+        'column_b': names[cols[order]],
+        'r': pair_values[order],
+    })
+
+def analyze_correlations(path, exclude=None, threshold=0.5, top=20):
+    """
+    Print the strongest correlations of a parquet table without loading it.
+    Like pandas corr(), each pair uses the rows where both columns are
+    present, so a sparse column does not drop rows from the other pairs.
+    """
+
+    print(f"STREAMING CORRELATION ANALYSIS: {Path(path).name}")
+    print("-" * 50)
+
+    acc = accumulate_moments(path, exclude=exclude)
+    correlation_matrix = acc.correlation()
+
+    print(f"Rows scanned: {acc.rows:,}")
+    print(f"Numeric columns: {len(acc.columns)}")
+    print(f"Rows with a missing value: {acc.rows - acc.complete_rows:,} (pairwise-complete correlation)")
+    if len(acc.columns) > 0:
+        print(f"Fewest rows behind a pair: {int(acc.n.min()):,}")
+
+    pairs = top_correlated_pairs(correlation_matrix, threshold=threshold, top=top)
+    print(f"\nStrongest correlations (|r| > {threshold}, top {top}):")
+    for row in pairs.itertuples(index=False):
+        print(f"  {row.column_a} vs {row.column_b}: {row.r:.3f}")
+
+    return correlation_matrix, pairs
+
+if __name__ == "__main__":
+    analyze_correlations("mock_data/shap_values.parquet", exclude=["Entity", "Horizon"])
@@ -0,0 +1,241 @@
+import pandas as pd
+import numpy as np
+from parquet_stream import resolve_table_path, iter_parquet_batches, open_dataset
+from time_index import to_epoch_seconds
+
+COVERAGE_TABLES = ['residuals', 'stability', 'live-predictions', 'shap_values']
+
+# Number of set bits in every possible byte
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def popcount(bits):
+    """
+    Count set bits in a packed uint8 bitset.
+    """
+
+    return int(POPCOUNT[bits].sum(dtype=np.int64))
+
+class CoverageBitset:
+    """
+    Packed bitset over the dense Entity x Marker x Horizon grid.
+
+    Each key tuple maps to bit (entity_pos * n_markers + marker_pos) *
+    n_horizons + horizon_pos, so ten million cells take about 1.2 MB.
+    """
+
+    def __init__(self, entities, markers, horizons):
+        self.entities = np.asarray(entities, dtype=np.int64)
+        self.markers = np.asarray(markers, dtype=np.int64)
+        self.horizons = np.asarray(horizons, dtype=np.int64)
+        self.n_cells = len(self.entities) * len(self.markers) * len(self.horizons)
+        self.bits = np.zeros((self.n_cells + 7) // 8, dtype=np.uint8)
+        self.rows = 0
+        self.unknown_rows = 0
+
+    def _positions(self, values, axis):
+        """
+        Position of each value on a sorted axis, plus a mask of values that
+        are on the axis. Compact integer axes (Entity, Horizon) use a dense
+        lookup array instead of a binary search.
+        """
+
+        if len(axis) == 0:
+            return np.zeros(len(values), dtype=np.int64), np.zeros(len(values), dtype=bool)
+
+        lo, hi = axis[0], axis[-1]
+        if hi - lo <= 16 * len(axis) + 1024:
+            lookup = np.full(hi - lo + 1, -1, dtype=np.int64)
+            lookup[axis - lo] = np.arange(len(axis))
+            inside = (values >= lo) & (values <= hi)
+            pos = np.where(inside, lookup[np.clip(values - lo, 0, hi - lo)], -1)
+            return np.maximum(pos, 0), pos >= 0
+
+        pos = np.searchsorted(axis, values)
+        pos = np.minimum(pos, len(axis) - 1)
+        return pos, axis[pos] == values
+
+    def add(self, entity, marker, horizon):
+        """
+        Set the bits of a batch of (Entity, Marker epoch seconds, Horizon)
+        keys. Keys outside the axes (e.g. an Entity missing from the entity
+        table) are counted in unknown_rows.
+        """
+
+        e_pos, e_ok = self._positions(entity, self.entities)
+        m_pos, m_ok = self._positions(marker, self.markers)
+        h_pos, h_ok = self._positions(horizon, self.horizons)
+        ok = e_ok & m_ok & h_ok
+
+        self.rows += len(entity)
+        self.unknown_rows += int((~ok).sum())
+
+        pos = (e_pos[ok] * len(self.markers) + m_pos[ok]) * len(self.horizons) + h_pos[ok]
+        byte, bit = pos >> 3, pos & 7
+
+        # One fancy-indexed OR per bit position: within a pass every write to
+        # the same byte carries the same value, so duplicates are harmless
+        # and this avoids the much slower np.bitwise_or.at
+        for k in range(8):
+            idx = byte[bit == k]
+            self.bits[idx] |= np.uint8(1 << k)
+
+    def unpack(self, entity_start, entity_stop):
+        """
+        Presence of a range of entities as a bool array of shape
+        (entities, markers, horizons).
+        """
+
+        cells_per_entity = len(self.markers) * len(self.horizons)
+        start, stop = entity_start * cells_per_entity, entity_stop * cells_per_entity
+        unpacked = np.unpackbits(self.bits[start // 8:(stop + 7) // 8], bitorder="little")
+        offset = start % 8
+        return unpacked[offset:offset + stop - start].reshape(-1, len(self.markers), len(self.horizons)).astype(bool)
+
+def _scan_axes(path, has_horizon, batch_size):
+    """
+    Collect the sorted Marker and Horizon values present in a table.
+    """
+
+    columns = ['Marker'] + (['Horizon'] if has_horizon else [])
+    markers, horizons = [], []
+    for batch in iter_parquet_batches(path, columns, batch_size):
+        markers.append(np.unique(to_epoch_seconds(batch['Marker'])))
+        if has_horizon:
+            horizons.append(np.unique(batch['Horizon'].to_numpy(dtype=np.int64)))
+    markers = np.unique(np.concatenate(markers)) if markers else np.empty(0, dtype=np.int64)
+    horizons = np.unique(np.concatenate(horizons)) if horizons else np.zeros(1, dtype=np.int64)
+    return markers, horizons
+
+def build_coverage(path, entities, batch_size=1_000_000):
+    """
+    Stream the key columns of a table into a CoverageBitset.
+    """
+
+    has_horizon = 'Horizon' in open_dataset(path).schema.names
+    markers, horizons = _scan_axes(path, has_horizon, batch_size)
+    coverage = CoverageBitset(entities, markers, horizons)
+
+    columns = ['Entity', 'Marker'] + (['Horizon'] if has_horizon else [])
+    for batch in iter_parquet_batches(path, columns, batch_size):
+        horizon = batch['Horizon'].to_numpy(dtype=np.int64) if has_horizon else np.zeros(len(batch), dtype=np.int64)
+        coverage.add(batch['Entity'].to_numpy(dtype=np.int64), to_epoch_seconds(batch['Marker']), horizon)
+    return coverage
+
+def summarize_coverage(coverage, entity_chunk=4096, max_missing_cells=1000):
+    """
+    Coverage statistics of a bitset.
+
+    A cell is expected when any entity has a row for that (Marker, Horizon),
+    so structurally impossible combinations (e.g. long horizons for the
+    earliest markers) are not reported as missing. Returns (summary dict,
+    per-Entity gap table, sample of missing cells).
+    """
+
+    n_entities = len(coverage.entities)
+    n_m, n_h = len(coverage.markers), len(coverage.horizons)
+
+    # Template of (Marker, Horizon) cells seen for any entity
+    template = np.zeros((n_m, n_h), dtype=bool)
+    for start in range(0, n_entities, entity_chunk):
+        template |= coverage.unpack(start, min(start + entity_chunk, n_entities)).any(axis=0)
+    expected_markers = template.any(axis=1)
+
+    missing_counts = np.zeros(n_entities, dtype=np.int64)
+    gap_runs = np.zeros(n_entities, dtype=np.int64)
+    longest_gap = np.zeros(n_entities, dtype=np.int64)
+    missing_samples = []
+
+    for start in range(0, n_entities, entity_chunk):
+        stop = min(start + entity_chunk, n_entities)
+        present = coverage.unpack(start, stop)
+        missing = template[None, :, :] & ~present
+        missing_counts[start:stop] = missing.sum(axis=(1, 2))
+
+        # Gap runs over markers that have at least one missing cell
+        gaps = missing.any(axis=2) & expected_markers[None, :]
+        padded = np.pad(gaps.astype(np.int8), ((0, 0), (1, 1)))
+        edges = np.diff(padded, axis=1)
+        gap_runs[start:stop] = (edges == 1).sum(axis=1)
+        run_starts = np.argwhere(edges == 1)
+        run_ends = np.argwhere(edges == -1)
+        if len(run_starts):
+            lengths = run_ends[:, 1] - run_starts[:, 1]
+            np.maximum.at(longest_gap, start + run_starts[:, 0], lengths)
+
+        if sum(len(s) for s in missing_samples) < max_missing_cells:
+            e_idx, m_idx, h_idx = np.nonzero(missing)
+            missing_samples.append(pd.DataFrame({
+                'Entity': coverage.entities[start + e_idx],
+                'Marker': pd.to_datetime(coverage.markers[m_idx], unit='s'),
+                'Horizon': coverage.horizons[h_idx],
+            }).head(max_missing_cells))
+
+    covered = popcount(coverage.bits)
+    expected = int(template.sum()) * n_entities
+    summary = {
+        'rows': coverage.rows,
+        'entities': n_entities,
+        'markers': n_m,
+        'horizons': n_h,
+        'grid_cells': coverage.n_cells,
+        'expected_cells': expected,
+        'covered_cells': covered,
+        'coverage_pct': covered / expected * 100 if expected else 0.0,
+        'missing_cells': int(missing_counts.sum()),
+        'duplicate_rows': coverage.rows - coverage.unknown_rows - covered,
+        'unknown_key_rows': coverage.unknown_rows,
+        'entities_without_rows': int((missing_counts == int(template.sum())).sum()),
+        'bitset_mb': coverage.bits.nbytes / 1024**2,
+    }
+
+    gaps = pd.DataFrame({
+        'Entity': coverage.entities,
+        'missing_cells': missing_counts,
+        'gap_runs': gap_runs,
+        'longest_gap_markers': longest_gap,
+    })
+    gaps = gaps[gaps['missing_cells'] > 0].reset_index(drop=True)
+
+    missing_samples = pd.concat(missing_samples, ignore_index=True).head(max_missing_cells) if missing_samples else pd.DataFrame()
+    return summary, gaps, missing_samples
+
+def analyze_coverage(data_dir="mock_data", tables=None):
+    """
+    Report Entity x Marker x Horizon completeness of the time-series tables.
+    """
+
+    print("COVERAGE ANALYSIS (Entity x Marker x Horizon)")
+    print("="*80)
+
+    entities = np.sort(pd.read_parquet(resolve_table_path(data_dir, "entity"), columns=['Entity'])['Entity'].to_numpy())
+    print(f"Entities in entity table: {len(entities):,}")
+
+    results = {}
+    for table_name in tables or COVERAGE_TABLES:
+        try:
+            path = resolve_table_path(data_dir, table_name)
+        except FileNotFoundError:
+            continue
+
+        summary, gaps, missing = summarize_coverage(build_coverage(path, entities))
+        results[table_name] = (summary, gaps, missing)
+
+        print(f"\n{table_name}:")
+        print("-" * 50)
+        print(f"  Rows: {summary['rows']:,}")
+        print(f"  Grid: {summary['entities']:,} entities x {summary['markers']} markers x {summary['horizons']} horizons "
+              f"= {summary['grid_cells']:,} cells ({summary['bitset_mb']:.2f} MB bitset)")
+        print(f"  Coverage: {summary['covered_cells']:,} / {summary['expected_cells']:,} expected cells "
+              f"({summary['coverage_pct']:.2f}%)")
+        print(f"  Missing cells: {summary['missing_cells']:,}")
+        print(f"  Entities with gaps: {len(gaps):,} ({summary['entities_without_rows']:,} with no rows at all)")
+        print(f"  Duplicate key rows: {summary['duplicate_rows']:,}")
+        print(f"  Rows with keys outside the entity table: {summary['unknown_key_rows']:,}")
+        if len(gaps):
+            print("  Entities with the most missing cells:")
+            print(gaps.nlargest(5, 'missing_cells').to_string(index=False))
+
+    return results
+
+if __name__ == "__main__":
+    results = analyze_coverage()
@@ -1,35 +1,70 @@
-import pandas as pd
 from pathlib import Path
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import FancyBboxPatch
-import numpy as np
 
-def create_relationship_diagram():
+# Define table positions and sizes
+TABLES = {
+    'entity': {'pos': (1, 8), 'size': (1.5, 0.8), 'color': '#FFE6E6'},
+    'sku-colddirnks': {'pos': (1, 6.5), 'size': (1.5, 0.8), 'color': '#E6F3FF'},
+    'entity-business-importance': {'pos': (1, 5), 'size': (1.5, 0.8), 'color': '#E6FFE6'},
+    'segmentation-entity': {'pos': (1, 3.5), 'size': (1.5, 0.8), 'color': '#FFF0E6'},
+    'segmentation': {'pos': (1, 2), 'size': (1.5, 0.8), 'color': '#F0E6FF'},
+    'building-blocks': {'pos': (4, 8), 'size': (1.5, 0.8), 'color': '#E6FFFF'},
+    'building-block-feature-map': {'pos': (4, 6.5), 'size': (1.5, 0.8), 'color': '#FFE6FF'},
+    'live-predictions': {'pos': (7, 8), 'size': (1.5, 0.8), 'color': '#FFFFE6'},
+    'residuals': {'pos': (7, 6.5), 'size': (1.5, 0.8), 'color': '#E6E6FF'},
+    'stability': {'pos': (7, 5), 'size': (1.5, 0.8), 'color': '#FFE6E6'}
+}
+
+# Relationships as (source, target, key)
+RELATIONSHIPS = [
+    # Entity relationships
+    ('entity', 'sku-colddirnks', 'SKU_ID'),
+    ('entity', 'entity-business-importance', 'Entity'),
+    ('entity', 'segmentation-entity', 'Entity'),
+    ('entity', 'live-predictions', 'Entity'),
+    ('entity', 'residuals', 'Entity'),
+    ('entity', 'stability', 'Entity'),
+    
+    # Segmentation relationships
+    ('segmentation-entity', 'segmentation', 'segment_id'),
+    
+    # Building block relationships
+    ('building-blocks', 'building-block-feature-map', 'name/building_block'),
+    
+    # Time series relationships
+    ('live-predictions', 'residuals', 'Entity, Marker, Horizon'),
+    ('residuals', 'stability', 'Entity, Cycle, Marker, Horizon')
+]
+
+def parse_relationship_keys(key):
+    """
+    Split a relationship key label into (source columns, target columns).
+    'a/b' joins source column a to target column b.
+    """
+
+    if "/" in key:
+        source_col, target_col = key.split("/")
+        return [source_col.strip()], [target_col.strip()]
+    columns = [col.strip() for col in key.split(",")]
+    return columns, columns
+
+def create_relationship_diagram(output_path='database_relationships.png'):
     """
     Create a visual diagram showing the relationships between tables.
     """
     
+    # matplotlib is only needed here, so keep it out of module import
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import FancyBboxPatch
+    
+    tables = TABLES
+    relationships = RELATIONSHIPS
+    
     # Create figure and axis
     fig, ax = plt.subplots(1, 1, figsize=(16, 12))
     ax.set_xlim(0, 10)
     ax.set_ylim(0, 10)
     ax.axis('off')
     
-    # Define table positions and sizes
-    tables = {
-        'entity': {'pos': (1, 8), 'size': (1.5, 0.8), 'color': '#FFE6E6'},
-        'sku-colddirnks': {'pos': (1, 6.5), 'size': (1.5, 0.8), 'color': '#E6F3FF'},
-        'entity-business-importance': {'pos': (1, 5), 'size': (1.5, 0.8), 'color': '#E6FFE6'},
-        'segmentation-entity': {'pos': (1, 3.5), 'size': (1.5, 0.8), 'color': '#FFF0E6'},
-        'segmentation': {'pos': (1, 2), 'size': (1.5, 0.8), 'color': '#F0E6FF'},
-        'building-blocks': {'pos': (4, 8), 'size': (1.5, 0.8), 'color': '#E6FFFF'},
-        'building-block-feature-map': {'pos': (4, 6.5), 'size': (1.5, 0.8), 'color': '#FFE6FF'},
-        'live-predictions': {'pos': (7, 8), 'size': (1.5, 0.8), 'color': '#FFFFE6'},
-        'residuals': {'pos': (7, 6.5), 'size': (1.5, 0.8), 'color': '#E6E6FF'},
-        'stability': {'pos': (7, 5), 'size': (1.5, 0.8), 'color': '#FFE6E6'}
-    }
-    
     # Draw tables
     for table_name, props in tables.items():
         x, y = props['pos']
@@ -50,27 +85,6 @@ def create_relationship_diagram():
         ax.text(x + width/2, y + height/2, table_name.replace('-', '\n'), 
                 ha='center', va='center', fontsize=8, fontweight='bold')
     
-    # Draw relationships
-    relationships = [
-        # Entity relationships
-        ('entity', 'sku-colddirnks', 'SKU_ID'),
-        ('entity', 'entity-business-importance', 'Entity'),
-        ('entity', 'segmentation-entity', 'Entity'),
-        ('entity', 'live-predictions', 'Entity'),
-        ('entity', 'residuals', 'Entity'),
-        ('entity', 'stability', 'Entity'),
-        
-        # Segmentation relationships
-        ('segmentation-entity', 'segmentation', 'segment_id'),
-        
-        # Building block relationships
-        ('building-blocks', 'building-block-feature-map', 'name/building_block'),
-        
-        # Time series relationships
-        ('live-predictions', 'residuals', 'Entity, Marker, Horizon'),
-        ('residuals', 'stability', 'Entity, Cycle, Marker, Horizon')
-    ]
-    
     # Draw relationship lines
     for source, target, key in relationships:
         if source in tables and target in tables:
@@ -115,10 +129,10 @@ def create_relationship_diagram():
     ax.legend(handles=legend_elements, loc='upper right', bbox_to_anchor=(0.98, 0.98))
     
     plt.tight_layout()
-    plt.savefig('database_relationships.png', dpi=300, bbox_inches='tight')
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
     plt.close()  # Close the figure instead of showing it
     
-    print("Relationship diagram saved as 'database_relationships.png'")
+    print(f"Relationship diagram saved as '{output_path}'")
 
 if __name__ == "__main__":
     create_relationship_diagram()
@@ -0,0 +1,275 @@
+import pandas as pd
+import numpy as np
+import json
+from pathlib import Path
+from parquet_stream import resolve_table_path, iter_parquet_batches, parquet_column_range, batch_fingerprint
+
+ALL_SEGMENTS = "all"
+
+# Groups with fewer batch rows are reported but never flagged
+MIN_BATCH_ROWS = 50
+
+# Bins are merged until each expects at least this many batch rows
+MIN_EXPECTED_PER_BIN = 10
+
+def merge_sparse_bins(reference_p, batch_n, min_expected=MIN_EXPECTED_PER_BIN):
+    """
+    Label adjacent bins so that each merged bin expects at least
+    min_expected batch rows under the reference distribution.
+
+    With few batch rows most of the fixed bins would be empty or hold one
+    row, and PSI then measures sampling noise rather than drift.
+    """
+
+    n_merged = max(int(batch_n // min_expected), 1)
+    before = np.cumsum(reference_p) - reference_p
+    return np.minimum((before * n_merged).astype(np.int64), n_merged - 1)
+
+def make_bin_edges(max_value, n_bins=20):
+    """
+    Fixed bin edges for non-negative demand values, equally spaced in
+    log1p space so the long right tail does not swallow every bin.
+    """
+
+    return np.expm1(np.linspace(0.0, np.log1p(max(float(max_value), 1.0)), n_bins + 1))
+
+def load_segment_lookup(data_dir="mock_data", segment_col='segment_id'):
+    """
+    Entity -> segment lookup from segmentation-entity, as (sorted entities,
+    segment labels). Entities in several segments keep their first one.
+    Returns None when the table is not available.
+    """
+
+    try:
+        seg_df = pd.read_parquet(resolve_table_path(data_dir, "segmentation-entity"), columns=['Entity', segment_col])
+    except (FileNotFoundError, KeyError):
+        return None
+    seg_df = seg_df.drop_duplicates('Entity').sort_values('Entity')
+    return seg_df['Entity'].to_numpy(), seg_df[segment_col].astype(str).to_numpy()
+
+class ReferenceHistograms:
+    """
+    Fixed-bin histograms of a value column per (Horizon, segment).
+
+    Counts are kept in one 2D array (one row per group, with an underflow
+    and an overflow bin at either end), so folding in a batch or
+    histogramming a new batch is a single bincount.
+    """
+
+    def __init__(self, edges, value_col='forecasted'):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.value_col = value_col
+        self.groups = {}
+        self.counts = np.zeros((0, len(self.edges) + 1), dtype=np.int64)
+        self.folded_batches = []
+
+    @property
+    def n_bins(self):
+        return self.counts.shape[1]
+
+    def _group_rows(self, horizons, segments, add_missing):
+        """
+        Map each row's (Horizon, segment) to a histogram row; unknown groups
+        get -1 unless add_missing is set.
+        """
+
+        keys = pd.MultiIndex.from_arrays([horizons, segments])
+        codes, uniques = pd.factorize(keys)
+        rows = np.empty(len(uniques), dtype=np.int64)
+        for i, key in enumerate(uniques):
+            key = (int(key[0]), str(key[1]))
+            if key not in self.groups and add_missing:
+                self.groups[key] = len(self.groups)
+            rows[i] = self.groups.get(key, -1)
+
+        if len(self.groups) > len(self.counts):
+            grown = np.zeros((len(self.groups), self.n_bins), dtype=np.int64)
+            grown[:len(self.counts)] = self.counts
+            self.counts = grown
+        return rows[codes]
+
+    def histogram(self, df, segment_lookup=None, add_missing=False):
+        """
+        Histogram a batch into a (groups, bins) count array aligned with the
+        reference groups.
+        """
+
+        values = df[self.value_col].to_numpy(dtype=np.float64)
+        horizons = df['Horizon'].to_numpy()
+        if segment_lookup is None:
+            segments = np.full(len(df), ALL_SEGMENTS)
+        else:
+            entities, labels = segment_lookup
+            pos = np.clip(np.searchsorted(entities, df['Entity'].to_numpy()), 0, len(entities) - 1)
+            segments = np.where(entities[pos] == df['Entity'].to_numpy(), labels[pos], "unsegmented")
+
+        rows = self._group_rows(horizons, segments, add_missing)
+        bins = np.searchsorted(self.edges, values, side="right")
+        keep = (rows >= 0) & ~np.isnan(values)
+        flat = rows[keep] * self.n_bins + bins[keep]
+        counts = np.bincount(flat, minlength=len(self.groups) * self.n_bins)
+        return counts.reshape(len(self.groups), self.n_bins)
+
+    def update(self, df, segment_lookup=None):
+        """
+        Fold a batch of history into the reference counts.
+        """
+
+        batch = self.histogram(df, segment_lookup, add_missing=True)
+        self.counts += batch
+        return self
+
+    def compare(self, batch_counts, psi_threshold=0.25, ks_threshold=0.1, alpha=0.5,
+                min_batch_n=MIN_BATCH_ROWS, min_expected=MIN_EXPECTED_PER_BIN):
+        """
+        PSI and KS statistic of batch histograms against the reference, one
+        row per group present in the batch.
+
+        PSI is computed per group on bins merged to at least min_expected
+        expected batch rows, with additive (alpha) smoothing of both count
+        vectors. The KS flag uses the larger of ks_threshold and the 1%
+        two-sample critical value for the group's sizes. Groups with fewer
+        than min_batch_n batch rows are never flagged.
+        """
+
+        ref_n = self.counts.sum(axis=1)
+        batch_n = batch_counts.sum(axis=1)
+        present = np.flatnonzero((batch_n > 0) & (ref_n > 0))
+
+        psi = np.empty(len(present))
+        ks = np.empty(len(present))
+        for i, row in enumerate(present):
+            p_full = self.counts[row] / ref_n[row]
+            q_full = batch_counts[row] / batch_n[row]
+            ks[i] = np.abs(np.cumsum(q_full) - np.cumsum(p_full)).max()
+
+            labels = merge_sparse_bins(p_full, batch_n[row], min_expected)
+            ref_merged = np.bincount(labels, weights=self.counts[row])
+            batch_merged = np.bincount(labels, weights=batch_counts[row])
+            p = (ref_merged + alpha) / (ref_n[row] + alpha * len(ref_merged))
+            q = (batch_merged + alpha) / (batch_n[row] + alpha * len(batch_merged))
+            psi[i] = ((q - p) * np.log(q / p)).sum()
+
+        n, m = ref_n[present], batch_n[present]
+        ks_critical = np.maximum(ks_threshold, 1.63 * np.sqrt((n + m) / (n * m)))
+        sufficient = m >= min_batch_n
+
+        keys = sorted(self.groups.items(), key=lambda item: item[1])
+        keys = np.array([key for key, _ in keys], dtype=object)[present]
+        return pd.DataFrame({
+            'Horizon': [key[0] for key in keys],
+            'segment': [key[1] for key in keys],
+            'reference_n': n,
+            'batch_n': m,
+            'psi': psi,
+            'ks': ks,
+            'drift': sufficient & ((psi > psi_threshold) | (ks > ks_critical)),
+            'sufficient': sufficient,
+        }).sort_values(['Horizon', 'segment']).reset_index(drop=True)
+
+    def save(self, path):
+        """
+        Persist edges, group keys and counts to an .npz file.
+        """
+
+        keys = sorted(self.groups.items(), key=lambda item: item[1])
+        np.savez(
+            path, edges=self.edges, counts=self.counts,
+            groups=np.array(json.dumps([list(key) for key, _ in keys])),
+            value_col=np.array(self.value_col),
+            folded_batches=np.array(json.dumps(self.folded_batches)),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a reference saved with save().
+        """
+
+        data = np.load(path)
+        reference = cls(data['edges'], str(data['value_col']))
+        reference.groups = {(int(h), str(s)): i for i, (h, s) in enumerate(json.loads(str(data['groups'])))}
+        reference.counts = data['counts']
+        if 'folded_batches' in data:
+            reference.folded_batches = json.loads(str(data['folded_batches']))
+        return reference
+
+    def fold_batch(self, batch_counts, fingerprint):
+        """
+        Add a checked batch's counts to the reference once; returns False
+        (and changes nothing) if the batch was already folded in.
+        """
+
+        if fingerprint in self.folded_batches:
+            return False
+        self.counts += batch_counts
+        self.folded_batches.append(fingerprint)
+        return True
+
+def build_reference(data_dir="mock_data", table="residuals", value_col='forecasted', n_bins=20, batch_size=1_000_000):
+    """
+    Build reference histograms by streaming the history table once.
+    """
+
+    path = resolve_table_path(data_dir, table)
+    value_range = parquet_column_range(path, value_col)
+    if value_range is None:
+        max_value = max(batch[value_col].max() for batch in iter_parquet_batches(path, [value_col], batch_size))
+    else:
+        max_value = value_range[1]
+
+    reference = ReferenceHistograms(make_bin_edges(max_value, n_bins), value_col)
+    segment_lookup = load_segment_lookup(data_dir)
+    for batch in iter_parquet_batches(path, ['Entity', 'Horizon', value_col], batch_size):
+        reference.update(batch, segment_lookup)
+    return reference
+
+def check_live_predictions(data_dir="mock_data", reference_path="drift_reference.npz", rebuild=False,
+                           update_reference=False, psi_threshold=0.25, ks_threshold=0.1):
+    """
+    Compare the live-predictions batch against the persisted reference
+    histograms. The reference is built from residuals history only when it
+    does not exist yet (or rebuild is set); checking never rescans history.
+    """
+
+    print("LIVE PREDICTIONS DRIFT CHECK")
+    print("="*80)
+
+    reference_path = Path(reference_path)
+    if rebuild or not reference_path.exists():
+        print(f"Building reference histograms from residuals history -> {reference_path}")
+        reference = build_reference(data_dir)
+        reference.save(reference_path)
+    else:
+        reference = ReferenceHistograms.load(reference_path)
+
+    segment_lookup = load_segment_lookup(data_dir)
+    live_path = resolve_table_path(data_dir, "live-predictions")
+    batch_counts = np.zeros_like(reference.counts)
+    for batch in iter_parquet_batches(live_path, ['Entity', 'Horizon', reference.value_col]):
+        batch_counts += reference.histogram(batch, segment_lookup)
+
+    result = reference.compare(batch_counts, psi_threshold, ks_threshold)
+
+    print(f"Reference groups (Horizon x segment): {len(reference.groups)}")
+    print(f"Reference rows: {int(reference.counts.sum()):,}")
+    print(f"Live rows matched to reference groups: {int(batch_counts.sum()):,}")
+    print(f"Groups compared: {len(result)}")
+    print(f"Groups with too few rows to judge (< {MIN_BATCH_ROWS}): {int((~result['sufficient']).sum())}")
+    print(f"Groups flagged (PSI > {psi_threshold} or KS > max({ks_threshold}, 1% critical value)): "
+          f"{int(result['drift'].sum())}")
+
+    print("\nLargest shifts by PSI:")
+    print(result.nlargest(10, 'psi').round(4).to_string(index=False))
+
+    if update_reference:
+        if reference.fold_batch(batch_counts, batch_fingerprint(live_path)):
+            reference.save(reference_path)
+            print(f"\nFolded live batch into reference {reference_path}")
+        else:
+            print(f"\nLive batch was already folded into {reference_path}; reference left unchanged")
+
+    return result
+
+if __name__ == "__main__":
+    result = check_live_predictions()
@@ -0,0 +1,317 @@
+import pandas as pd
+import numpy as np
+import json
+from parquet_stream import resolve_table_path, iter_parquet_batches, batch_fingerprint
+from time_index import to_epoch_seconds
+from drift_monitor import load_segment_lookup, ALL_SEGMENTS
+
+# Summed measures kept per cell, in order along the first array axis
+MEASURES = ['error', 'abs_error', 'sq_error', 'count']
+
+def _extend_axis(axis, values):
+    """
+    Union of a sorted axis with new values, plus the positions of the old
+    axis entries on the new one.
+    """
+
+    new_axis = np.union1d(axis, values)
+    return new_axis, np.searchsorted(new_axis, axis)
+
+class ErrorTriangle:
+    """
+    Dense Cycle x Horizon x Segment error sums.
+
+    All measures live in one float64 array of shape (measures, cycles,
+    horizons, segments). Rows are scattered in with one bincount per
+    measure over the flattened integer-coded cell index, so horizon decay
+    or a vintage comparison is a slice of the array rather than a
+    multi-key groupby. New Cycles grow the array by one row each; existing
+    rows are never recomputed.
+    """
+
+    def __init__(self, cycles=(), horizons=(), segments=()):
+        self.cycles = np.asarray(cycles, dtype=np.int64)
+        self.horizons = np.asarray(horizons, dtype=np.int64)
+        self.segments = np.asarray(segments, dtype=object)
+        self.sums = np.zeros((len(MEASURES), len(self.cycles), len(self.horizons), len(self.segments)))
+        self.sources = []
+
+    def _grow(self, cycles, horizons, segments):
+        """
+        Extend the axes to cover new values, moving existing sums into place.
+        """
+
+        new_cycles, cycle_pos = _extend_axis(self.cycles, cycles)
+        new_horizons, horizon_pos = _extend_axis(self.horizons, horizons)
+        new_segments = np.asarray(sorted(set(self.segments) | set(segments)), dtype=object)
+        segment_pos = np.searchsorted(new_segments, self.segments)
+
+        if (len(new_cycles), len(new_horizons), len(new_segments)) == self.sums.shape[1:]:
+            return
+
+        grown = np.zeros((len(MEASURES), len(new_cycles), len(new_horizons), len(new_segments)))
+        grown[np.ix_(np.arange(len(MEASURES)), cycle_pos, horizon_pos, segment_pos)] = self.sums
+        self.cycles, self.horizons, self.segments, self.sums = new_cycles, new_horizons, new_segments, grown
+
+    def add(self, cycle, horizon, error, segment=None):
+        """
+        Scatter-add a batch of rows (Cycle epoch seconds, Horizon, signed
+        error and optional segment labels), growing the axes as needed.
+        """
+
+        cycle = np.asarray(cycle, dtype=np.int64)
+        horizon = np.asarray(horizon, dtype=np.int64)
+        error = np.asarray(error, dtype=np.float64)
+        if segment is None:
+            segment = np.full(len(cycle), ALL_SEGMENTS, dtype=object)
+
+        keep = ~np.isnan(error)
+        cycle, horizon, error, segment = cycle[keep], horizon[keep], error[keep], np.asarray(segment, dtype=object)[keep]
+
+        segment_values, segment_codes = np.unique(segment.astype(str), return_inverse=True)
+        self._grow(np.unique(cycle), np.unique(horizon), segment_values)
+
+        c = np.searchsorted(self.cycles, cycle)
+        h = np.searchsorted(self.horizons, horizon)
+        s = np.searchsorted(self.segments, segment_values.astype(object))[segment_codes]
+        n_c, n_h, n_s = self.sums.shape[1:]
+        flat = (c * n_h + h) * n_s + s
+
+        for i, weights in enumerate([error, np.abs(error), error ** 2, None]):
+            self.sums[i] += np.bincount(flat, weights=weights, minlength=n_c * n_h * n_s).reshape(n_c, n_h, n_s)
+        return self
+
+    def append(self, df, error_col='error', segment_lookup=None):
+        """
+        Fold a frame (e.g. the newest Cycle of residuals) into the triangle.
+        """
+
+        return self.add(to_epoch_seconds(df['Cycle']), df['Horizon'].to_numpy(), df[error_col].to_numpy(dtype=np.float64),
+                        _segments_for(df, segment_lookup))
+
+    def _positions(self, other):
+        """
+        Positions of another triangle's axis entries on this one's axes, or
+        None for entries this triangle does not have.
+        """
+
+        def lookup(axis, values):
+            pos = np.minimum(np.searchsorted(axis, values), max(len(axis) - 1, 0))
+            found = (pos < len(axis)) & (axis[pos] == values) if len(axis) else np.zeros(len(values), dtype=bool)
+            return np.where(found, pos, -1)
+
+        return lookup(self.cycles, other.cycles), lookup(self.horizons, other.horizons), lookup(self.segments, other.segments)
+
+    def merge(self, other):
+        """
+        Add another triangle's sums (e.g. of a newly observed Marker) into
+        this one, growing the axes as needed.
+        """
+
+        self._grow(other.cycles, other.horizons, other.segments)
+        c, h, s = self._positions(other)
+        self.sums[np.ix_(np.arange(len(MEASURES)), c, h, s)] += other.sums
+        return self
+
+    def append_parquet(self, path, error_col='error', segment_lookup=None, replace=False):
+        """
+        Fold a parquet file (typically the rows of a newly observed Marker,
+        which land on Cycles already on the axis) into the triangle exactly
+        once.
+
+        Returns the number of rows added, or None if this file was already
+        applied. Rows for (Cycle, Horizon, Segment) cells that already hold
+        data raise ValueError, or with replace have just those cells
+        rebuilt from the file.
+        """
+
+        fingerprint = batch_fingerprint(path)
+        if fingerprint in self.sources:
+            return None
+
+        new = build_error_triangle(path, error_col, segment_lookup)
+        new_counts = new.sums[MEASURES.index('count')]
+        c, h, s = self._positions(new)
+        shared = np.ix_(c >= 0, h >= 0, s >= 0)
+        overlap = np.zeros(new_counts.shape, dtype=bool)
+        overlap[shared] = (new_counts[shared] > 0) & (self.sums[MEASURES.index('count')][np.ix_(c[c >= 0], h[h >= 0], s[s >= 0])] > 0)
+
+        if overlap.any():
+            if not replace:
+                cycle, horizon, _ = np.argwhere(overlap)[0]
+                raise ValueError(
+                    f"{path} holds rows for {int(overlap.sum())} cell(s) already in the triangle (first: Cycle "
+                    f"{pd.to_datetime(new.cycles[cycle], unit='s').date()}, Horizon {new.horizons[horizon]}); "
+                    "use replace to rebuild them"
+                )
+            cells = np.nonzero(overlap)
+            self.sums[:, c[cells[0]], h[cells[1]], s[cells[2]]] = 0.0
+
+        self.merge(new)
+        self.sources.append(fingerprint)
+        return int(new_counts.sum())
+
+    def _measure(self, name, segment=None):
+        sums = self.sums[MEASURES.index(name)]
+        if segment is None:
+            return sums.sum(axis=2)
+        return sums[:, :, list(self.segments).index(segment)]
+
+    def _ratio(self, name, segment=None, cycles=None, axis=None):
+        num, count = self._measure(name, segment), self._measure('count', segment)
+        if cycles is not None:
+            rows = np.flatnonzero(np.isin(self.cycles, to_epoch_seconds(cycles)))
+            num, count = num[rows], count[rows]
+        if axis is not None:
+            num, count = num.sum(axis=axis), count.sum(axis=axis)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, num / count, np.nan)
+
+    def mae(self, segment=None):
+        """
+        (cycles, horizons) mean absolute error; NaN for empty cells.
+        """
+
+        return self._ratio('abs_error', segment)
+
+    def bias(self, segment=None):
+        """
+        (cycles, horizons) mean signed error; NaN for empty cells.
+        """
+
+        return self._ratio('error', segment)
+
+    def rmse(self, segment=None):
+        """
+        (cycles, horizons) root mean squared error; NaN for empty cells.
+        """
+
+        return np.sqrt(self._ratio('sq_error', segment))
+
+    def horizon_decay(self, segment=None, cycles=None):
+        """
+        MAE, bias and row count per Horizon, pooled over all (or the given)
+        Cycles.
+        """
+
+        count = self._measure('count', segment)
+        if cycles is not None:
+            count = count[np.isin(self.cycles, to_epoch_seconds(cycles))]
+        return pd.DataFrame({
+            'Horizon': self.horizons,
+            'mae': self._ratio('abs_error', segment, cycles, axis=0),
+            'bias': self._ratio('error', segment, cycles, axis=0),
+            'rows': count.sum(axis=0).astype(np.int64),
+        })
+
+    def vintages(self, segment=None, last=None):
+        """
+        MAE per Cycle (rows) and Horizon (columns) as a frame, optionally
+        only the last N Cycles.
+        """
+
+        mae = self.mae(segment)
+        cycles = pd.to_datetime(self.cycles, unit='s')
+        if last is not None:
+            mae, cycles = mae[-last:], cycles[-last:]
+        return pd.DataFrame(mae, index=pd.Index(cycles, name='Cycle'), columns=pd.Index(self.horizons, name='Horizon'))
+
+    def save(self, path):
+        """
+        Persist the axes and sums to an .npz file.
+        """
+
+        np.savez(path, cycles=self.cycles, horizons=self.horizons, sums=self.sums,
+                 segments=np.array(json.dumps([str(s) for s in self.segments])),
+                 sources=np.array(json.dumps(self.sources)))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a triangle saved with save().
+        """
+
+        data = np.load(path)
+        triangle = cls(data['cycles'], data['horizons'], json.loads(str(data['segments'])))
+        triangle.sums = data['sums']
+        if 'sources' in data:
+            triangle.sources = json.loads(str(data['sources']))
+        return triangle
+
+def _segments_for(df, segment_lookup):
+    """
+    Segment label per row from a load_segment_lookup() result, or None.
+    """
+
+    if segment_lookup is None:
+        return None
+    entities, labels = segment_lookup
+    values = df['Entity'].to_numpy()
+    pos = np.clip(np.searchsorted(entities, values), 0, len(entities) - 1)
+    return np.where(entities[pos] == values, labels[pos], "unsegmented").astype(object)
+
+def build_error_triangle(path, error_col='error', segment_lookup=None, batch_size=1_000_000):
+    """
+    Build a triangle in one streaming pass over a residuals-style table.
+    For stability tables pass error_col='forecast_change'.
+    """
+
+    triangle = ErrorTriangle()
+    for batch in iter_parquet_batches(path, ['Entity', 'Cycle', 'Horizon', error_col], batch_size):
+        triangle.append(batch, error_col, segment_lookup)
+    return triangle
+
+def analyze_error_triangle(data_dir="mock_data", table="full_residuals", error_col='error', by_segment=False,
+                           triangle_path=None, append_path=None, replace=False):
+    """
+    Print horizon decay and recent vintages of a Cycle x Horizon error
+    triangle. With triangle_path the triangle is loaded from (and saved to)
+    disk; append_path folds the rows of another file, typically a newly
+    observed Marker, into it without rebuilding (once per file; see
+    append_parquet).
+    """
+
+    print(f"CYCLE x HORIZON ERROR TRIANGLE ({table}, {error_col})")
+    print("="*80)
+
+    segment_lookup = load_segment_lookup(data_dir) if by_segment else None
+    triangle = None
+    if triangle_path is not None:
+        try:
+            triangle = ErrorTriangle.load(triangle_path)
+            print(f"Loaded triangle from {triangle_path}")
+        except FileNotFoundError:
+            print(f"No triangle at {triangle_path}; building it")
+    if triangle is None:
+        triangle = build_error_triangle(resolve_table_path(data_dir, table), error_col, segment_lookup)
+
+    if append_path is not None:
+        added = triangle.append_parquet(append_path, error_col, segment_lookup, replace)
+        if added is None:
+            print(f"{append_path} was already appended; triangle unchanged")
+        else:
+            print(f"Appended {append_path}: {added:,} rows")
+
+    if triangle_path is not None:
+        triangle.save(triangle_path)
+
+    print(f"Cycles: {len(triangle.cycles)}, Horizons: {len(triangle.horizons)}, Segments: {len(triangle.segments)}")
+    print(f"Rows: {int(triangle.sums[MEASURES.index('count')].sum()):,}")
+
+    print("\nHorizon decay (all cycles):")
+    print(triangle.horizon_decay().round(4).to_string(index=False))
+
+    print("\nMAE by vintage (last 6 cycles):")
+    print(triangle.vintages(last=6).round(4).to_string())
+
+    if len(triangle.segments) > 1:
+        print("\nMAE by segment and horizon:")
+        decay = pd.DataFrame({
+            segment: triangle.horizon_decay(segment)['mae'].to_numpy() for segment in triangle.segments
+        }, index=pd.Index(triangle.horizons, name='Horizon'))
+        print(decay.round(4).to_string())
+
+    return triangle
+
+if __name__ == "__main__":
+    triangle = analyze_error_triangle()
@@ -0,0 +1,289 @@
+import pandas as pd
+import numpy as np
+import json
+import shutil
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from parquet_stream import resolve_table_path
+from snapshot_diff import DIGEST_METADATA_KEY, frame_content_digest
+
+TIME_SERIES_TABLES = [
+    'full_residuals', 'residuals', 'stability', 'live-predictions', 'full_shap_values', 'shap_values'
+]
+
+DIMENSION_TABLES = [
+    'entity', 'sku-colddirnks', 'entity-business-importance', 'segmentation-entity', 'segmentation',
+    'building-blocks', 'building-block-feature-map', 'warehouse-london'
+]
+
+KEY_COLUMNS = ['Entity', 'Cycle', 'Marker', 'Horizon']
+
+def _splitmix64(x):
+    """
+    Vectorized splitmix64 finalizer (uint64 arithmetic wraps around).
+    """
+
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def _key_normal(seed, stream, *keys):
+    """
+    Standard normal noise that is a pure function of the key columns.
+
+    Every table derives its values from the same keys, so residuals,
+    stability and live predictions agree with each other no matter how the
+    rows are partitioned or chunked.
+    """
+
+    h = np.full(len(keys[0]), np.uint64(seed * 1000003 + stream))
+    for key in keys:
+        h = _splitmix64(h ^ np.asarray(key).astype(np.uint64))
+    u1 = ((h >> np.uint64(11)).astype(np.float64) + 0.5) / 2.0**53
+    u2 = ((_splitmix64(h) >> np.uint64(11)).astype(np.float64) + 0.5) / 2.0**53
+    return np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+def load_generation_keys(data_dir="mock_data"):
+    """
+    Read Entity keys (and base demand levels when the SKU master is
+    available) so the generated tables join cleanly to entity.parquet.
+    """
+
+    entity_df = pd.read_parquet(resolve_table_path(data_dir, "entity"))
+    entity_df = entity_df.sort_values('Entity').reset_index(drop=True)
+
+    try:
+        sku_df = pd.read_parquet(resolve_table_path(data_dir, "sku-colddirnks"), columns=['SKU_ID', 'base_ships'])
+        levels = entity_df.merge(sku_df, on='SKU_ID', how='left')['base_ships'].to_numpy(dtype=np.float64, copy=True)
+    except (FileNotFoundError, KeyError):
+        levels = np.full(len(entity_df), np.nan)
+
+    # Entities without a SKU level get a deterministic lognormal one
+    missing = np.isnan(levels)
+    fallback = 100.0 * np.exp(0.75 * _key_normal(0, 99, entity_df['Entity'].to_numpy()))
+    levels[missing] = fallback[missing]
+
+    return entity_df['Entity'].to_numpy(), levels
+
+def load_feature_names(data_dir="mock_data", n_features=40):
+    """
+    Use the feature names from building-block-feature-map when present so
+    SHAP columns resolve to building blocks; otherwise make up names.
+    """
+
+    try:
+        feature_map = pd.read_parquet(resolve_table_path(data_dir, "building-block-feature-map"))
+        return list(pd.unique(feature_map['feature']))
+    except (FileNotFoundError, KeyError):
+        return [f"feature_{i:03d}" for i in range(n_features)]
+
+def _expected_demand(entities, levels, marker_idx, seed):
+    amplitude = 0.2 + 0.1 * _key_normal(seed, 1, entities)
+    return levels * (1.0 + amplitude * np.sin(2 * np.pi * marker_idx / 52.0))
+
+def _build_chunk(table_name, entities, levels, cycle_idx, config):
+    """
+    Build one chunk of a time-series table for the given entities and cycles.
+    """
+
+    seed = config['seed']
+    n_horizons = config['n_horizons']
+    start = pd.Timestamp(config['start_date'])
+    last_cycle = config['n_cycles'] - 1
+
+    # Full Entity x Cycle x Horizon grid for this chunk
+    e_pos = np.repeat(np.arange(len(entities)), len(cycle_idx) * n_horizons)
+    c_idx = np.tile(np.repeat(cycle_idx, n_horizons), len(entities))
+    horizon = np.tile(np.arange(1, n_horizons + 1), len(entities) * len(cycle_idx))
+    m_idx = c_idx + horizon
+
+    # Residual tables only contain markers that have already been observed
+    # and stability needs the previous cycle to have forecast the same marker
+    if table_name in ('full_residuals', 'residuals', 'full_shap_values', 'shap_values'):
+        keep = m_idx <= last_cycle
+    elif table_name == 'stability':
+        keep = horizon < n_horizons
+    else:
+        keep = slice(None)
+    e_pos, c_idx, horizon, m_idx = e_pos[keep], c_idx[keep], horizon[keep], m_idx[keep]
+
+    entity = entities[e_pos]
+    expected = _expected_demand(entity, levels[e_pos], m_idx, seed)
+    forecasted = expected * np.exp(0.05 * np.sqrt(horizon) * _key_normal(seed, 2, entity, c_idx, horizon))
+
+    columns = {
+        'Entity': entity,
+        'Cycle': start + pd.to_timedelta(c_idx * 7, unit='D'),
+        'Marker': start + pd.to_timedelta(m_idx * 7, unit='D'),
+        'Horizon': horizon.astype(np.int64),
+    }
+
+    if table_name in ('full_residuals', 'residuals'):
+        observed = expected * np.exp(0.15 * _key_normal(seed, 3, entity, m_idx))
+        error = observed - forecasted
+        columns.update({
+            'observed': observed,
+            'forecasted': forecasted,
+            'error': error,
+            'absolute_error': np.abs(error),
+        })
+    elif table_name == 'stability':
+        previous = expected * np.exp(0.05 * np.sqrt(horizon + 1) * _key_normal(seed, 2, entity, c_idx - 1, horizon + 1))
+        columns.update({
+            'forecasted': forecasted,
+            'previous_forecasted': previous,
+            'forecast_change': forecasted - previous,
+        })
+    elif table_name == 'live-predictions':
+        del columns['Cycle']
+        columns['forecasted'] = forecasted
+    else:
+        del columns['Cycle']
+        for i, feature in enumerate(config['features']):
+            scale = forecasted / (len(config['features']) * (i + 1))
+            columns[feature] = (scale * _key_normal(seed, 100 + i, entity, m_idx, horizon)).astype(np.float32)
+
+    return pa.table(columns)
+
+def _table_cycles(table_name, config):
+    """
+    Cycle indices covered by each table.
+    """
+
+    n_cycles = config['n_cycles']
+    if table_name == 'live-predictions':
+        return np.array([n_cycles - 1])
+    if table_name in ('residuals', 'shap_values'):
+        return np.arange(max(n_cycles - config['recent_cycles'], 0), n_cycles)
+    if table_name == 'stability':
+        return np.arange(1, n_cycles)
+    return np.arange(n_cycles)
+
+def _write_partition(table_name, part, entities, levels, output_dir, config):
+    """
+    Stream one entity partition of a table into its own parquet file.
+
+    Row groups are written one at a time so that their content digests
+    can be stored in the footer, sparing snapshot diffs a full read.
+    """
+
+    part_path = Path(output_dir) / table_name / f"part-{part:05d}.parquet"
+    cycles = _table_cycles(table_name, config)
+    rows_per_cycle = max(len(entities) * config['n_horizons'], 1)
+    cycles_per_chunk = max(config['chunk_rows'] // rows_per_cycle, 1)
+
+    rows = 0
+    writer = None
+    digests = []
+    try:
+        for start in range(0, len(cycles), cycles_per_chunk):
+            chunk = _build_chunk(table_name, entities, levels, cycles[start:start + cycles_per_chunk], config)
+            if writer is None:
+                dictionary_columns = [c for c in KEY_COLUMNS if c in chunk.column_names]
+                writer = pq.ParquetWriter(
+                    part_path, chunk.schema,
+                    compression=config['compression'],
+                    use_dictionary=dictionary_columns if config['use_dictionary'] else False,
+                )
+            for offset in range(0, chunk.num_rows, config['row_group_size']):
+                row_group = chunk.slice(offset, config['row_group_size'])
+                digests.append(frame_content_digest(row_group.to_pandas()))
+                writer.write_table(row_group, row_group_size=config['row_group_size'])
+            rows += chunk.num_rows
+        if writer is not None and hasattr(writer, 'add_key_value_metadata'):
+            writer.add_key_value_metadata({DIGEST_METADATA_KEY: json.dumps(digests)})
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return table_name, part, rows
+
+def generate_mock_data(output_dir, data_dir="mock_data", tables=None, n_cycles=104, n_horizons=13,
+                       recent_cycles=13, n_partitions=8, max_workers=None, chunk_rows=1_000_000,
+                       row_group_size=256_000, compression="zstd", use_dictionary=True,
+                       start_date="2023-01-02", seed=0, copy_dimensions=True):
+    """
+    Regenerate the time-series mock tables at arbitrary volume.
+
+    Entities are split into n_partitions and each (table, partition) is
+    written by its own worker process as output_dir/<table>/part-NNNNN.parquet,
+    in chunks of about chunk_rows rows, so nothing close to the full table
+    is ever held in memory. Entity keys come from data_dir/entity.parquet
+    and the dimension tables are copied over so output_dir can be used as a
+    data root by the analysis tools.
+    """
+
+    output_dir = Path(output_dir)
+    tables = list(tables or TIME_SERIES_TABLES)
+
+    print("MOCK DATA GENERATION")
+    print("="*80)
+
+    entities, levels = load_generation_keys(data_dir)
+    config = {
+        'n_cycles': n_cycles,
+        'n_horizons': n_horizons,
+        'recent_cycles': recent_cycles,
+        'chunk_rows': chunk_rows,
+        'row_group_size': row_group_size,
+        'compression': compression,
+        'use_dictionary': use_dictionary,
+        'start_date': start_date,
+        'seed': seed,
+        'features': load_feature_names(data_dir),
+    }
+
+    print(f"Entities: {len(entities):,}")
+    print(f"Cycles: {n_cycles}, Horizons: {n_horizons}")
+    print(f"Tables: {', '.join(tables)}")
+    print(f"Partitions per table: {n_partitions}")
+    print(f"Row group size: {row_group_size:,}, Compression: {compression}, Dictionary keys: {use_dictionary}")
+
+    for table_name in tables:
+        table_dir = output_dir / table_name
+        if table_dir.exists():
+            shutil.rmtree(table_dir)
+        table_dir.mkdir(parents=True)
+
+    if copy_dimensions:
+        for table_name in DIMENSION_TABLES:
+            try:
+                source = resolve_table_path(data_dir, table_name)
+            except FileNotFoundError:
+                continue
+            if source.is_file():
+                shutil.copy2(source, output_dir / source.name)
+
+    entity_parts = np.array_split(np.arange(len(entities)), n_partitions)
+    start = time.perf_counter()
+    table_rows = {table_name: 0 for table_name in tables}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_write_partition, table_name, part, entities[idx], levels[idx], output_dir, config)
+            for table_name in tables
+            for part, idx in enumerate(entity_parts)
+            if len(idx) > 0
+        ]
+        for future in futures:
+            table_name, part, rows = future.result()
+            table_rows[table_name] += rows
+
+    elapsed = time.perf_counter() - start
+
+    print("\n" + "="*80)
+    print("GENERATED TABLES")
+    print("-" * 50)
+    for table_name, rows in table_rows.items():
+        size = sum(f.stat().st_size for f in (output_dir / table_name).glob("*.parquet"))
+        print(f"  {table_name}: {rows:,} rows, {size / 1024**2:.1f} MB")
+    print(f"\nGeneration time: {elapsed:.2f}s")
+
+    return table_rows
+
+if __name__ == "__main__":
+    table_rows = generate_mock_data("generated_data")
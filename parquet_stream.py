@@ -0,0 +1,185 @@
+import hashlib
+import queue
+import threading
+from pathlib import Path
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Number of decoded batches/tables read ahead of the consumer
+PREFETCH_DEPTH = 2
+
+_DONE = object()
+
+def resolve_table_path(data_dir, table_name):
+    """
+    Locate a table in the data directory, either as a single
+    <table>.parquet file or as a partitioned <table>/ directory.
+    """
+
+    data_dir = Path(data_dir)
+    file_path = data_dir / f"{table_name}.parquet"
+    if file_path.exists():
+        return file_path
+
+    dir_path = data_dir / table_name
+    if dir_path.is_dir():
+        return dir_path
+
+    raise FileNotFoundError(f"Table '{table_name}' not found in {data_dir}")
+
+def discover_tables(data_dir):
+    """
+    Map table name -> path for every <table>.parquet file and partitioned
+    <table>/ directory in the data directory.
+    """
+
+    tables = {}
+    for entry in sorted(Path(data_dir).iterdir()):
+        if entry.is_file() and entry.suffix == ".parquet":
+            tables[entry.stem] = entry
+        elif entry.is_dir() and any(entry.glob("*.parquet")):
+            tables[entry.name] = entry
+    return tables
+
+def batch_fingerprint(path):
+    """
+    SHA-1 of the bytes of a parquet file (or of every file of a
+    partitioned directory), identifying one published batch.
+    """
+
+    path = Path(path)
+    digest = hashlib.sha1()
+    for file_path in (sorted(path.glob("*.parquet")) if path.is_dir() else [path]):
+        digest.update(file_path.name.encode())
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def open_dataset(path):
+    """
+    Open a parquet file or a directory of parquet files as a pyarrow dataset.
+    """
+
+    return ds.dataset(str(path), format="parquet")
+
+def count_rows(path):
+    """
+    Count rows using only the parquet footers.
+    """
+
+    return open_dataset(path).count_rows()
+
+def prefetch(iterable, depth=PREFETCH_DEPTH):
+    """
+    Iterate over iterable on a background thread, keeping at most depth
+    items ready ahead of the consumer.
+
+    Reading and decoding the next item then overlaps with whatever the
+    consumer does with the current one, while the bounded queue caps how
+    much decoded data is held in memory. Exceptions raised by the producer
+    are re-raised in the consumer. With depth <= 0 the iterable is consumed
+    inline.
+    """
+
+    if depth <= 0:
+        yield from iterable
+        return
+
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+
+    producer = threading.Thread(target=produce, name="parquet-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # Unblock the producer if the consumer stopped early
+        stop.set()
+        producer.join()
+
+def _decoded_batches(path, columns, batch_size, filter=None):
+    dataset = open_dataset(path)
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size, filter=filter):
+        if batch.num_rows == 0:
+            continue
+        yield batch.to_pandas()
+
+def iter_parquet_batches(path, columns=None, batch_size=65536, prefetch_depth=PREFETCH_DEPTH, filter=None):
+    """
+    Stream a parquet file (or partitioned directory) as pandas DataFrames
+    of at most batch_size rows, so tables never have to fit in memory.
+
+    Batches are read and converted to pandas up to prefetch_depth batches
+    ahead on a background thread. An optional pyarrow filter expression is
+    pushed down, so row groups whose statistics exclude it are skipped.
+    """
+
+    return prefetch(_decoded_batches(path, columns, batch_size, filter), depth=prefetch_depth)
+
+def parquet_column_range(path, column):
+    """
+    Return (min, max) of a column from the row group statistics in the
+    parquet footers, or None if any row group is missing statistics.
+    """
+
+    dataset = open_dataset(path)
+    col_min, col_max = None, None
+
+    for file_path in dataset.files:
+        metadata = pq.ParquetFile(file_path).metadata
+        col_idx = metadata.schema.names.index(column)
+        for rg in range(metadata.num_row_groups):
+            stats = metadata.row_group(rg).column(col_idx).statistics
+            if stats is None or not stats.has_min_max:
+                return None
+            col_min = stats.min if col_min is None else min(col_min, stats.min)
+            col_max = stats.max if col_max is None else max(col_max, stats.max)
+
+    if col_min is None:
+        return None
+    return col_min, col_max
+
+def parquet_null_count(path, column):
+    """
+    Return the total null count of a column from the parquet footers, or
+    None if any row group is missing statistics.
+    """
+
+    dataset = open_dataset(path)
+    nulls = 0
+
+    for file_path in dataset.files:
+        metadata = pq.ParquetFile(file_path).metadata
+        col_idx = metadata.schema.names.index(column)
+        for rg in range(metadata.num_row_groups):
+            stats = metadata.row_group(rg).column(col_idx).statistics
+            if stats is None or not stats.has_null_count:
+                return None
+            nulls += stats.null_count
+
+    return nulls
@@ -0,0 +1,55 @@
+import pandas as pd
+from parquet_stream import resolve_table_path
+
+def plot_sku_observed_over_time(sku_id, data_dir="mock_data", output_path=None):
+    """
+    Plot observed vs forecasted demand over time for one SKU, summed over
+    its warehouses.
+    """
+
+    # matplotlib is only needed here, so keep it out of module import
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    entity_df = pd.read_parquet(resolve_table_path(data_dir, "entity"))
+    if pd.api.types.is_numeric_dtype(entity_df['SKU_ID']):
+        sku_entities = entity_df.loc[entity_df['SKU_ID'] == int(sku_id), 'Entity']
+    else:
+        sku_entities = entity_df.loc[entity_df['SKU_ID'].astype(str) == str(sku_id), 'Entity']
+
+    if sku_entities.empty:
+        print(f"SKU {sku_id} not found in entity table")
+        return None
+
+    residuals_df = pd.read_parquet(
+        resolve_table_path(data_dir, "residuals"),
+        columns=['Entity', 'Marker', 'Horizon', 'observed', 'forecasted'],
+        filters=[('Entity', 'in', sku_entities.tolist())],
+    )
+
+    # Shortest horizon gives one observed value per entity and marker
+    first_horizon = residuals_df.groupby(['Entity', 'Marker'])['Horizon'].transform('min')
+    residuals_df = residuals_df[residuals_df['Horizon'] == first_horizon]
+    over_time = residuals_df.groupby('Marker')[['observed', 'forecasted']].sum().sort_index()
+
+    if output_path is None:
+        output_path = f"sku_{sku_id}_observed_over_time.png"
+
+    fig, ax = plt.subplots(1, 1, figsize=(12, 5))
+    ax.plot(over_time.index, over_time['observed'], label='Observed', linewidth=1.5)
+    ax.plot(over_time.index, over_time['forecasted'], label='Forecasted (shortest horizon)', linewidth=1.0, alpha=0.8)
+    ax.set_title(f"SKU {sku_id}: observed demand over time ({len(sku_entities)} warehouses)")
+    ax.set_xlabel("Marker")
+    ax.set_ylabel("Units")
+    ax.legend()
+
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    plt.close()
+
+    print(f"Plot saved as '{output_path}'")
+    return over_time
+
+if __name__ == "__main__":
+    over_time = plot_sku_observed_over_time("0248")
@@ -0,0 +1,214 @@
+import pandas as pd
+import numpy as np
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+from parquet_stream import resolve_table_path
+
+SHAP_KEY_COLUMNS = ['Entity', 'Cycle', 'Marker', 'Horizon']
+
+class WarmTables:
+    """
+    Keeps the entity dimension and the hot time-series tables resident in
+    memory, sorted by Entity so per-entity lookups are a binary search, and
+    memoizes query results.
+    """
+
+    def __init__(self, data_dir="mock_data", tables=("residuals", "stability", "shap_values")):
+        self.data_dir = Path(data_dir)
+        self.entity = pd.read_parquet(resolve_table_path(data_dir, "entity")).set_index('Entity').sort_index()
+        self.tables = {}
+        self.entity_keys = {}
+
+        for table_name in tables:
+            try:
+                df = pd.read_parquet(resolve_table_path(data_dir, table_name))
+            except FileNotFoundError:
+                continue
+            df = df.sort_values('Entity', kind="stable").reset_index(drop=True)
+            self.tables[table_name] = df
+            self.entity_keys[table_name] = df['Entity'].to_numpy()
+
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def cached(self, key, compute):
+        """
+        Return a memoized result, computing it once on first request.
+        """
+
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        result = compute()
+        with self._lock:
+            self._cache[key] = result
+        return result
+
+    def entity_rows(self, table_name, entity):
+        """
+        Rows of a table for one Entity via binary search on the sorted keys.
+        """
+
+        keys = self.entity_keys[table_name]
+        lo, hi = np.searchsorted(keys, [entity, entity + 1])
+        return self.tables[table_name].iloc[lo:hi]
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+def _error_summary(df):
+    return {
+        'records': int(len(df)),
+        'mean_error': float(df['error'].mean()),
+        'mean_absolute_error': float(df['absolute_error'].mean()),
+        'median_absolute_error': float(df['absolute_error'].median()),
+        'correlation_observed_forecasted': float(df['observed'].corr(df['forecasted'])),
+    }
+
+def query_tables(warm, route, params):
+    """
+    Answer one query against the warm tables; returns a JSON-serializable
+    object. Raises KeyError for unknown routes or missing tables.
+    """
+
+    entity = int(params['entity']) if 'entity' in params else None
+
+    if route == "/health":
+        return {'status': 'ok'}
+
+    if route == "/tables":
+        tables = {'entity': list(warm.entity.reset_index().shape)}
+        tables.update({name: list(df.shape) for name, df in warm.tables.items()})
+        return tables
+
+    if route == "/entity":
+        row = warm.entity.loc[entity]
+        return {'Entity': entity, **row.to_dict()}
+
+    if route == "/residuals/summary":
+        if entity is None:
+            return warm.cached(route, lambda: _error_summary(warm.tables['residuals']))
+        summary = _error_summary(warm.entity_rows('residuals', entity))
+        return {'Entity': entity, **warm.entity.loc[entity].to_dict(), **summary}
+
+    if route == "/residuals/horizon":
+        def compute():
+            df = warm.tables['residuals'] if entity is None else warm.entity_rows('residuals', entity)
+            stats = df.groupby('Horizon').agg(
+                records=('error', 'size'),
+                mean_error=('error', 'mean'),
+                mean_absolute_error=('absolute_error', 'mean'),
+                observed_mean=('observed', 'mean'),
+                forecasted_mean=('forecasted', 'mean'),
+            )
+            return stats.reset_index().to_dict('records')
+        return warm.cached((route, entity), compute)
+
+    if route == "/stability/summary":
+        def compute():
+            df = warm.tables['stability'] if entity is None else warm.entity_rows('stability', entity)
+            value_cols = [c for c in df.select_dtypes(include=[np.number]).columns if c not in ('Entity', 'Horizon')]
+            stats = df.groupby('Horizon')[value_cols].agg(lambda s: s.abs().mean())
+            return stats.reset_index().to_dict('records')
+        return warm.cached((route, entity), compute)
+
+    if route == "/shap/top":
+        k = int(params.get('k', 10))
+        def compute():
+            df = warm.tables['shap_values'] if entity is None else warm.entity_rows('shap_values', entity)
+            feature_cols = [c for c in df.select_dtypes(include=[np.number]).columns if c not in SHAP_KEY_COLUMNS]
+            importance = df[feature_cols].abs().mean().nlargest(k)
+            return [{'feature': name, 'mean_abs_shap': float(value)} for name, value in importance.items()]
+        return warm.cached((route, entity, k), compute)
+
+    raise KeyError(route)
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """
+    HTTPServer that hands each connection to a fixed-size thread pool
+    instead of spawning a thread per request.
+    """
+
+    def __init__(self, server_address, handler_class, warm, max_workers=8):
+        super().__init__(server_address, handler_class)
+        self.warm = warm
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    GET /<route>?entity=...&k=... returning JSON.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        start = time.perf_counter()
+        try:
+            result = query_tables(self.server.warm, url.path.rstrip("/") or "/health", params)
+            status = 200
+        except KeyError as e:
+            result, status = {'error': f"not found: {e}"}, 404
+        except ValueError as e:
+            result, status = {'error': f"bad request: {e}"}, 400
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        body = json.dumps({'result': result, 'elapsed_ms': round(elapsed_ms, 3)}, default=_json_default).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_queries(data_dir="mock_data", host="127.0.0.1", port=8765, max_workers=8):
+    """
+    Load the hot tables once and serve queries until interrupted.
+    """
+
+    print("LOCAL QUERY SERVICE")
+    print("="*80)
+
+    start = time.perf_counter()
+    warm = WarmTables(data_dir)
+    print(f"Loaded {len(warm.tables) + 1} tables in {time.perf_counter() - start:.2f}s")
+    for table_name, df in warm.tables.items():
+        print(f"  {table_name}: {df.shape}")
+
+    server = ThreadPoolHTTPServer((host, port), QueryHandler, warm, max_workers=max_workers)
+    print(f"\nServing on http://{host}:{port} with {max_workers} worker threads")
+    print("Routes: /health /tables /entity /residuals/summary /residuals/horizon /stability/summary /shap/top")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    serve_queries()
@@ -0,0 +1,229 @@
+import pandas as pd
+import numpy as np
+from parquet_stream import resolve_table_path, iter_parquet_batches, parquet_column_range
+
+# Consistency constants so MAD / IQR estimate a normal standard deviation
+MAD_TO_STD = 1.4826
+IQR_TO_STD = 1 / 1.349
+
+# Sketch range in units of the typical |error|; rarer extremes share the edge bins
+SKETCH_SPAN = 1e4
+
+def _robust_scale_floor(median, scale):
+    """
+    Keep the robust scale away from zero for near-constant entities.
+    """
+
+    return np.maximum(scale, 1e-6 * (np.abs(median) + 1.0))
+
+def robust_stats_exact(df, value_col='error'):
+    """
+    Exact per-Entity median and MAD-based scale of an in-memory frame.
+    """
+
+    grouped = df.groupby('Entity')[value_col]
+    median = grouped.median()
+    deviation = (df[value_col] - df['Entity'].map(median)).abs()
+    mad = deviation.groupby(df['Entity']).median()
+
+    stats = pd.DataFrame({'median': median, 'scale': mad * MAD_TO_STD, 'rows': grouped.size()})
+    stats['scale'] = _robust_scale_floor(stats['median'].to_numpy(), stats['scale'].to_numpy())
+    return stats
+
+def score_frame(df, stats, value_col='error', threshold=5.0):
+    """
+    Robust z-scores of a frame against per-Entity stats; returns the
+    compact (Entity, Marker, Horizon, value, score) table of rows whose
+    |score| exceeds threshold.
+    """
+
+    median = df['Entity'].map(stats['median']).to_numpy(dtype=np.float64)
+    scale = df['Entity'].map(stats['scale']).to_numpy(dtype=np.float64)
+    score = (df[value_col].to_numpy(dtype=np.float64) - median) / scale
+    mask = np.abs(score) > threshold
+
+    return pd.DataFrame({
+        'Entity': df['Entity'].to_numpy()[mask],
+        'Marker': df['Marker'].to_numpy()[mask],
+        'Horizon': df['Horizon'].to_numpy()[mask],
+        value_col: df[value_col].to_numpy()[mask],
+        'score': score[mask],
+    })
+
+def detect_anomalies_in_frame(df, value_col='error', threshold=5.0):
+    """
+    Flag residual spikes in an in-memory frame using exact median/MAD.
+    """
+
+    return score_frame(df, robust_stats_exact(df, value_col), value_col, threshold)
+
+class EntityQuantileSketch:
+    """
+    Fixed-bin histogram per Entity in asinh space.
+
+    asinh behaves like a signed log for large values and is linear near
+    zero, so a few hundred bins give a roughly constant relative
+    resolution over the whole error range. All entities share one dense
+    (entities, bins) count array updated with a single bincount per batch.
+    """
+
+    def __init__(self, entity_min, entity_max, value_min, value_max, n_bins=512, unit=1.0):
+        self.entity_min = int(entity_min)
+        self.n_entities = int(entity_max) - self.entity_min + 1
+        self.unit = float(unit)
+        self.n_bins = n_bins
+        self.t_lo = np.arcsinh(value_min / self.unit)
+        self.t_hi = np.arcsinh(value_max / self.unit)
+        self.width = max(self.t_hi - self.t_lo, 1e-12) / n_bins
+        self.counts = np.zeros((self.n_entities, n_bins), dtype=np.int64)
+
+    def _bins(self, values):
+        t = np.arcsinh(values / self.unit)
+        return np.clip(((t - self.t_lo) / self.width).astype(np.int64), 0, self.n_bins - 1)
+
+    def update(self, entities, values):
+        """
+        Add a batch of (Entity, value) observations.
+        """
+
+        keep = ~np.isnan(values)
+        flat = (entities[keep] - self.entity_min) * self.n_bins + self._bins(values[keep])
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def quantiles(self, qs):
+        """
+        Interpolated quantiles per Entity, shape (len(qs), entities); NaN for
+        entities without observations.
+        """
+
+        cum = np.cumsum(self.counts, axis=1)
+        total = cum[:, -1].astype(np.float64)
+        out = np.full((len(qs), self.n_entities), np.nan)
+        has_rows = total > 0
+        rows = np.flatnonzero(has_rows)
+
+        for i, q in enumerate(qs):
+            target = q * total[rows]
+            bin_idx = (cum[rows] < target[:, None]).sum(axis=1)
+            bin_idx = np.minimum(bin_idx, self.n_bins - 1)
+            before = np.where(bin_idx > 0, cum[rows, np.maximum(bin_idx - 1, 0)], 0)
+            in_bin = np.maximum(self.counts[rows, bin_idx], 1)
+            frac = np.clip((target - before) / in_bin, 0.0, 1.0)
+            t = self.t_lo + (bin_idx + frac) * self.width
+            out[i, rows] = np.sinh(t) * self.unit
+        return out
+
+def _typical_magnitude(exponent_counts):
+    """
+    Median |value| to within a factor of two from a histogram of base-2
+    exponents (index offset by 1100, as filled by robust_stats_sketch).
+    """
+
+    total = exponent_counts.sum()
+    if total == 0:
+        return 1.0
+    median_bin = int(np.searchsorted(np.cumsum(exponent_counts), total / 2))
+    return float(2.0 ** (median_bin - 1100))
+
+def robust_stats_sketch(path, value_col='error', n_bins=512, batch_size=1_000_000):
+    """
+    Per-Entity median and IQR-based scale from streaming passes over a
+    table, in memory proportional to entities x bins rather than rows.
+
+    A coarse first pass finds the typical |error| from a base-2 exponent
+    histogram; that sets the sketch resolution, and the sketch range is
+    capped at SKETCH_SPAN times it, so a few extreme rows cannot coarsen
+    the bins for everyone else.
+    """
+
+    entity_range = parquet_column_range(path, 'Entity')
+    columns = [value_col] if entity_range is not None else ['Entity', value_col]
+    entity_bounds, value_range = [np.inf, -np.inf], [np.inf, -np.inf]
+    exponent_counts = np.zeros(2200, dtype=np.int64)
+    for batch in iter_parquet_batches(path, columns, batch_size):
+        values = batch[value_col].to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            continue
+        value_range = [min(value_range[0], values.min()), max(value_range[1], values.max())]
+        nonzero = values[values != 0]
+        exponent_counts += np.bincount(np.frexp(np.abs(nonzero))[1] + 1100, minlength=len(exponent_counts))
+        if entity_range is None:
+            entity_bounds = [min(entity_bounds[0], batch['Entity'].min()), max(entity_bounds[1], batch['Entity'].max())]
+    if entity_range is None:
+        entity_range = entity_bounds
+    if not np.isfinite(value_range[0]):
+        value_range = [0.0, 0.0]
+
+    unit = _typical_magnitude(exponent_counts)
+    value_range = [max(value_range[0], -SKETCH_SPAN * unit), min(value_range[1], SKETCH_SPAN * unit)]
+    sketch = EntityQuantileSketch(entity_range[0], entity_range[1], value_range[0], value_range[1], n_bins, unit)
+    for batch in iter_parquet_batches(path, ['Entity', value_col], batch_size):
+        sketch.update(batch['Entity'].to_numpy(dtype=np.int64), batch[value_col].to_numpy(dtype=np.float64))
+
+    q25, q50, q75 = sketch.quantiles([0.25, 0.5, 0.75])
+    rows = sketch.counts.sum(axis=1)
+    present = rows > 0
+    index = pd.Index(np.arange(sketch.n_entities)[present] + sketch.entity_min, name='Entity')
+    stats = pd.DataFrame({
+        'median': q50[present],
+        'scale': (q75 - q25)[present] * IQR_TO_STD,
+        'rows': rows[present],
+    }, index=index)
+    stats['scale'] = _robust_scale_floor(stats['median'].to_numpy(), stats['scale'].to_numpy())
+    return stats
+
+def detect_anomalies(path, value_col='error', threshold=5.0, method='sketch', batch_size=1_000_000):
+    """
+    Stream a residuals table and return the compact anomaly table.
+
+    With method='sketch' the per-Entity stats come from asinh histograms
+    (two passes) and rows are scored in a final pass, so memory is bounded
+    regardless of table size. method='exact' loads the value column to
+    compute exact median/MAD.
+    """
+
+    if method == 'sketch':
+        stats = robust_stats_sketch(path, value_col, batch_size=batch_size)
+    else:
+        stats = robust_stats_exact(pd.read_parquet(path, columns=['Entity', value_col]), value_col)
+
+    anomalies = []
+    columns = ['Entity', 'Marker', 'Horizon', value_col]
+    for batch in iter_parquet_batches(path, columns, batch_size):
+        anomalies.append(score_frame(batch, stats, value_col, threshold))
+
+    anomalies = pd.concat(anomalies, ignore_index=True) if anomalies else pd.DataFrame(columns=columns + ['score'])
+    return anomalies, stats
+
+def analyze_residual_anomalies(data_dir="mock_data", table="full_residuals", threshold=5.0, method='sketch', output_path=None):
+    """
+    Print per-Entity robust anomaly detection results for a residuals table.
+    """
+
+    print(f"RESIDUAL ANOMALY DETECTION ({table}, {method}, |score| > {threshold})")
+    print("="*80)
+
+    anomalies, stats = detect_anomalies(resolve_table_path(data_dir, table), threshold=threshold, method=method)
+
+    print(f"Entities scored: {len(stats):,}")
+    print(f"Rows scored: {int(stats['rows'].sum()):,}")
+    print(f"Anomalous rows: {len(anomalies):,} ({len(anomalies) / max(stats['rows'].sum(), 1) * 100:.3f}%)")
+    print(f"Entities with anomalies: {anomalies['Entity'].nunique():,}")
+
+    print("\nRobust scale per Entity:")
+    print(f"  Median: {stats['scale'].median():.4f}")
+    print(f"  Max: {stats['scale'].max():.4f}")
+
+    print("\nTop anomalies by |score|:")
+    top = anomalies.reindex(anomalies['score'].abs().sort_values(ascending=False).index).head(10)
+    print(top.round({"score": 4, "error": 4}).to_string(index=False))
+
+    if output_path is not None:
+        anomalies.to_parquet(output_path, index=False)
+        print(f"\nWrote {len(anomalies):,} anomalies to {output_path}")
+
+    return anomalies, stats
+
+if __name__ == "__main__":
+    anomalies, stats = analyze_residual_anomalies()
@@ -0,0 +1,171 @@
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from parquet_stream import resolve_table_path, iter_parquet_batches, open_dataset
+
+KEY_COLUMNS = ['Entity', 'Cycle', 'Marker', 'Horizon']
+
+UNMAPPED_BLOCK = "unmapped"
+
+def shap_feature_columns(path):
+    """
+    Key columns present in a SHAP table and its numeric feature columns.
+    """
+
+    schema = open_dataset(path).schema
+    keys = [col for col in KEY_COLUMNS if col in schema.names]
+    features = [field.name for field in schema
+                if field.name not in keys and (pa.types.is_floating(field.type) or pa.types.is_integer(field.type))]
+    return keys, features
+
+def load_building_block_lookup(data_dir, features):
+    """
+    Integer lookup from feature position to building block.
+
+    Returns (lookup, block_names) where block_names lists the blocks from
+    building-blocks (plus any only named in the feature map) and
+    UNMAPPED_BLOCK last, and lookup[i] is the index into block_names of
+    feature i's block.
+    """
+
+    try:
+        feature_map = pd.read_parquet(resolve_table_path(data_dir, "building-block-feature-map"),
+                                      columns=['feature', 'building_block'])
+    except (FileNotFoundError, KeyError):
+        feature_map = pd.DataFrame({'feature': [], 'building_block': []})
+    try:
+        block_names = list(pd.read_parquet(resolve_table_path(data_dir, "building-blocks"), columns=['name'])['name'])
+    except (FileNotFoundError, KeyError):
+        block_names = []
+
+    feature_map = feature_map.drop_duplicates('feature')
+    block_names += [block for block in pd.unique(feature_map['building_block']) if block not in block_names]
+    block_names.append(UNMAPPED_BLOCK)
+
+    block_index = {block: i for i, block in enumerate(block_names)}
+    feature_block = dict(zip(feature_map['feature'], feature_map['building_block']))
+    lookup = np.array([block_index.get(feature_block.get(feature), len(block_names) - 1) for feature in features],
+                      dtype=np.int32)
+    return lookup, np.array(block_names, dtype=object)
+
+def top_k_indices(shap, k):
+    """
+    Column indices of the k largest |SHAP| values per row, ordered by
+    decreasing magnitude. NaNs are never preferred over real values.
+    """
+
+    magnitude = np.abs(shap)
+    magnitude[np.isnan(magnitude)] = -1.0
+    n_features = magnitude.shape[1]
+    k = min(k, n_features)
+
+    if k < n_features:
+        idx = np.argpartition(magnitude, n_features - k, axis=1)[:, n_features - k:]
+    else:
+        idx = np.broadcast_to(np.arange(n_features), magnitude.shape).copy()
+
+    order = np.argsort(-np.take_along_axis(magnitude, idx, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1)
+
+def top_shap_frame(batch, keys, features, k, lookup, block_names):
+    """
+    Compact long table (keys..., rank, feature, shap_value, building_block)
+    of the top-k drivers of every row of a batch. feature and
+    building_block are categoricals over fixed categories so frames from
+    different batches concatenate without re-encoding.
+    """
+
+    shap = batch[features].to_numpy(dtype=np.float32)
+    idx = top_k_indices(shap, k)
+    n_rows, k = idx.shape
+
+    frame = {col: np.repeat(batch[col].to_numpy(), k) for col in keys}
+    # Smallest signed integer type that holds k, so wide tables do not wrap
+    frame['rank'] = np.tile(np.arange(1, k + 1, dtype=np.min_scalar_type(-k)), n_rows)
+    frame['feature'] = pd.Categorical.from_codes(idx.ravel(), categories=features)
+    frame['shap_value'] = np.take_along_axis(shap, idx, axis=1).ravel()
+    frame['building_block'] = pd.Categorical.from_codes(lookup[idx].ravel(), categories=block_names)
+    return pd.DataFrame(frame)
+
+def iter_top_shap(path, k=5, data_dir="mock_data", batch_size=262144):
+    """
+    Stream a SHAP table and yield the top-k long table batch by batch.
+    """
+
+    keys, features = shap_feature_columns(path)
+    lookup, block_names = load_building_block_lookup(data_dir, features)
+    for batch in iter_parquet_batches(path, keys + features, batch_size):
+        yield top_shap_frame(batch, keys, features, k, lookup, block_names)
+
+def extract_top_shap(path, k=5, data_dir="mock_data", batch_size=262144, output_path=None):
+    """
+    Top-k SHAP drivers for every row of a SHAP table.
+
+    With output_path the long table is streamed to parquet and a per
+    (rank, building_block) count summary is returned; otherwise the full
+    long table is returned.
+    """
+
+    if output_path is None:
+        frames = list(iter_top_shap(path, k, data_dir, batch_size))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    writer = None
+    summary = []
+    try:
+        for frame in iter_top_shap(path, k, data_dir, batch_size):
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema, compression="zstd")
+            writer.write_table(table)
+            summary.append(frame.groupby(['rank', 'building_block'], observed=True).size())
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if not summary:
+        return pd.DataFrame(columns=['rank', 'building_block', 'rows'])
+    summary = pd.concat(summary).groupby(level=[0, 1], observed=True).sum()
+    return summary.rename('rows').reset_index()
+
+def analyze_top_shap(data_dir="mock_data", table="full_shap_values", k=5, output_path=None):
+    """
+    Print the top-k SHAP driver summary of a SHAP table.
+    """
+
+    print(f"TOP-{k} SHAP DRIVERS ({table})")
+    print("="*80)
+
+    path = resolve_table_path(data_dir, table)
+    keys, features = shap_feature_columns(path)
+    print(f"Key columns: {keys}")
+    print(f"Feature columns: {len(features)}")
+
+    if output_path is not None:
+        summary = extract_top_shap(path, k, data_dir, output_path=output_path)
+        print(f"Wrote top-{k} long table ({int(summary['rows'].sum()):,} rows) to {output_path}")
+    else:
+        top = extract_top_shap(path, k, data_dir)
+        print(f"Long table rows: {len(top):,} ({top.memory_usage(deep=True).sum() / 1024**2:.1f} MB)")
+        print("\nSample:")
+        print(top.head(2 * k).to_string(index=False))
+        summary = top.groupby(['rank', 'building_block'], observed=True).size().rename('rows').reset_index()
+
+    print("\nBuilding blocks of the top driver (rank 1):")
+    rank_one = summary[summary['rank'] == 1].sort_values('rows', ascending=False)
+    rank_one = rank_one.assign(share=rank_one['rows'] / rank_one['rows'].sum() * 100)
+    print(rank_one[['building_block', 'rows', 'share']].round(2).to_string(index=False))
+
+    print(f"\nBuilding blocks across the top {k} drivers:")
+    totals = summary.groupby('building_block', observed=True)['rows'].sum().sort_values(ascending=False)
+    print(totals.to_string())
+
+    return summary
+
+if __name__ == "__main__":
+    summary = analyze_top_shap()
@@ -0,0 +1,194 @@
+import pandas as pd
+import numpy as np
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from parquet_stream import resolve_table_path
+
+ELASTICITY_COLUMNS = ['elasticity_price', 'elasticity_season', 'elasticity_holiday', 'elasticity_trend']
+
+def load_entity_parameters(data_dir="mock_data"):
+    """
+    Broadcast the SKU master's base_ships and elasticities onto every
+    SKU x Warehouse entity, ordered by Entity.
+    """
+
+    entity_df = pd.read_parquet(
+        resolve_table_path(data_dir, "entity"),
+        columns=['Entity', 'SKU_ID', 'Warehouse_ID']
+    )
+    sku_df = pd.read_parquet(
+        resolve_table_path(data_dir, "sku-colddirnks"),
+        columns=['SKU_ID', 'base_ships'] + ELASTICITY_COLUMNS
+    )
+
+    params = entity_df.merge(sku_df, on='SKU_ID', how='inner')
+    return params.sort_values('Entity').reset_index(drop=True)
+
+def make_horizon_grid(n_steps=52, period=52, holiday_steps=(25, 47, 51)):
+    """
+    Build the horizon grid driving the simulation.
+
+    season is a unit sine wave over the period, holiday is a 0/1 indicator
+    for the given steps and trend is the elapsed time in periods.
+    """
+
+    steps = np.arange(1, n_steps + 1)
+    holiday = np.isin(steps % period, np.asarray(holiday_steps) % period)
+
+    return {
+        'step': steps,
+        'season': np.sin(2 * np.pi * steps / period).astype(np.float32),
+        'holiday': holiday.astype(np.float32),
+        'trend': (steps / period).astype(np.float32),
+    }
+
+def make_scenarios(n_scenarios, seed=0, price_change_std=0.10, season_scale_std=0.25, holiday_scale_std=0.25):
+    """
+    Draw random price, season and holiday shocks, one row per scenario.
+
+    price_change is a fractional price move (0.1 = +10%); season_scale and
+    holiday_scale multiply the seasonal and holiday effects (1.0 = as-is).
+    """
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'scenario': np.arange(n_scenarios, dtype=np.int32),
+        'price_change': np.clip(rng.normal(0.0, price_change_std, n_scenarios), -0.9, None),
+        'season_scale': rng.normal(1.0, season_scale_std, n_scenarios),
+        'holiday_scale': rng.normal(1.0, holiday_scale_std, n_scenarios),
+    })
+
+def simulate_demand(params, grid, scenarios, max_cells=50_000_000):
+    """
+    Simulate demand paths for every scenario x entity x step.
+
+    Uses a constant-elasticity (log-linear) demand model:
+
+        log D = log(base_ships)
+                + elasticity_price * log(1 + price_change)
+                + elasticity_season * season_scale * season[step]
+                + elasticity_holiday * holiday_scale * holiday[step]
+                + elasticity_trend * trend[step]
+
+    Yields (scenario_ids, demand) with demand a float32 array of shape
+    (scenarios_in_chunk, entities, steps). Scenarios are processed in chunks
+    of at most max_cells values to bound memory.
+    """
+
+    log_base = np.log(np.maximum(params['base_ships'].to_numpy(dtype=np.float32), 1e-6))
+    e_price = params['elasticity_price'].to_numpy(dtype=np.float32)
+    e_season = params['elasticity_season'].to_numpy(dtype=np.float32)
+    e_holiday = params['elasticity_holiday'].to_numpy(dtype=np.float32)
+    e_trend = params['elasticity_trend'].to_numpy(dtype=np.float32)
+
+    # Scenario-independent part of the log demand: (entities, steps)
+    log_baseline = log_base[:, None] + e_trend[:, None] * grid['trend'][None, :]
+
+    price_shock = np.log1p(scenarios['price_change'].to_numpy(dtype=np.float32))
+    season_scale = scenarios['season_scale'].to_numpy(dtype=np.float32)
+    holiday_scale = scenarios['holiday_scale'].to_numpy(dtype=np.float32)
+    scenario_ids = scenarios['scenario'].to_numpy()
+
+    n_entities, n_steps = log_baseline.shape
+    chunk = max(int(max_cells // max(n_entities * n_steps, 1)), 1)
+
+    for start in range(0, len(scenarios), chunk):
+        sl = slice(start, start + chunk)
+
+        demand = np.empty((len(scenario_ids[sl]), n_entities, n_steps), dtype=np.float32)
+        demand[:] = log_baseline
+        demand += (price_shock[sl, None] * e_price[None, :])[:, :, None]
+        demand += season_scale[sl, None, None] * (e_season[:, None] * grid['season'][None, :])
+        demand += holiday_scale[sl, None, None] * (e_holiday[:, None] * grid['holiday'][None, :])
+        np.exp(demand, out=demand)
+
+        yield scenario_ids[sl], demand
+
+def write_simulation_parquet(output_path, params, grid, scenarios, max_cells=50_000_000,
+                             row_group_size=1_000_000, compression="zstd"):
+    """
+    Run the simulation and stream it to parquet in long format
+    (scenario, Entity, step, simulated_demand). The scenario parameters are
+    written next to it as <name>_scenarios.parquet.
+    """
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    scenarios.to_parquet(output_path.with_name(f"{output_path.stem}_scenarios.parquet"), index=False)
+
+    entities = params['Entity'].to_numpy()
+    steps = grid['step'].astype(np.int16)
+    schema = pa.schema([
+        ('scenario', pa.int32()),
+        ('Entity', pa.from_numpy_dtype(entities.dtype)),
+        ('step', pa.int16()),
+        ('simulated_demand', pa.float32()),
+    ])
+
+    rows = 0
+    with pq.ParquetWriter(output_path, schema, compression=compression) as writer:
+        for scenario_ids, demand in simulate_demand(params, grid, scenarios, max_cells):
+            n_s, n_e, n_h = demand.shape
+            table = pa.table({
+                'scenario': np.repeat(scenario_ids.astype(np.int32), n_e * n_h),
+                'Entity': np.tile(np.repeat(entities, n_h), n_s),
+                'step': np.tile(steps, n_s * n_e),
+                'simulated_demand': demand.ravel(),
+            }, schema=schema)
+            writer.write_table(table, row_group_size=row_group_size)
+            rows += table.num_rows
+
+    return rows
+
+def run_demand_simulation(data_dir="mock_data", n_scenarios=1000, n_steps=52, seed=0, output_path=None):
+    """
+    Simulate demand scenarios over the SKU master and print a summary.
+    """
+
+    print("ELASTICITY-DRIVEN DEMAND SIMULATION")
+    print("="*80)
+
+    params = load_entity_parameters(data_dir)
+    grid = make_horizon_grid(n_steps=n_steps)
+    scenarios = make_scenarios(n_scenarios, seed=seed)
+
+    print(f"Entities: {len(params):,}")
+    print(f"Scenarios: {n_scenarios:,}")
+    print(f"Horizon steps: {n_steps}")
+    print(f"Simulated cells: {len(params) * n_scenarios * n_steps:,}")
+
+    start = time.perf_counter()
+    total_demand = np.empty(n_scenarios)
+    entity_mean_path = np.zeros((len(params), n_steps))
+    for scenario_ids, demand in simulate_demand(params, grid, scenarios):
+        total_demand[scenario_ids] = demand.sum(axis=(1, 2), dtype=np.float64)
+        entity_mean_path += demand.sum(axis=0, dtype=np.float64)
+    entity_mean_path /= n_scenarios
+    elapsed = time.perf_counter() - start
+
+    print(f"Simulation time: {elapsed:.2f}s")
+
+    print("\n" + "="*80)
+    print("TOTAL DEMAND ACROSS SCENARIOS")
+    print("-" * 50)
+    print(f"  Mean: {total_demand.mean():,.0f}")
+    print(f"  P05: {np.percentile(total_demand, 5):,.0f}")
+    print(f"  P50: {np.percentile(total_demand, 50):,.0f}")
+    print(f"  P95: {np.percentile(total_demand, 95):,.0f}")
+
+    corr = np.corrcoef(scenarios['price_change'], total_demand)[0, 1]
+    print(f"\nCorrelation of price change with total demand: {corr:.3f}")
+
+    print("\nMean demand per step (all entities):")
+    print(pd.Series(entity_mean_path.sum(axis=0), index=grid['step']).round(0).head(13).to_string())
+
+    if output_path is not None:
+        rows = write_simulation_parquet(output_path, params, grid, scenarios)
+        print(f"\nWrote {rows:,} rows to {output_path}")
+
+    return scenarios, total_demand, entity_mean_path
+
+if __name__ == "__main__":
+    scenarios, total_demand, entity_mean_path = run_demand_simulation()
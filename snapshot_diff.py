@@ -0,0 +1,354 @@
+import hashlib
+import json
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import pyarrow.parquet as pq
+from parquet_stream import prefetch
+from check_duplicates import hash_rows
+
+DEFAULT_KEY_COLUMNS = ['Entity', 'Cycle', 'Marker', 'Horizon']
+
+# Footer key holding per-row-group content digests written at generation time
+DIGEST_METADATA_KEY = b"row_group_content_digests"
+
+# Digests of files without them in the footer are cached here, not in the data directory
+DIGEST_CACHE_DIR = ".digest_cache"
+
+def parquet_files(path):
+    """
+    Parquet files of a table: the file itself or the sorted files of a
+    partitioned directory.
+    """
+
+    path = Path(path)
+    return sorted(path.glob("*.parquet")) if path.is_dir() else [path]
+
+def row_group_fingerprints(path):
+    """
+    Fingerprint every row group from the parquet footers alone.
+
+    The fingerprint covers the row count and, per column chunk, the
+    compressed size and min/max/null statistics. Differing fingerprints
+    prove a row group changed; equal ones do not prove it is unchanged.
+    Returns a list of (file, row group index, fingerprint, compressed bytes).
+    """
+
+    fingerprints = []
+    for file_path in parquet_files(path):
+        metadata = pq.ParquetFile(file_path).metadata
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            digest = hashlib.blake2b(str(row_group.num_rows).encode(), digest_size=16)
+            compressed = 0
+            for j in range(row_group.num_columns):
+                column = row_group.column(j)
+                compressed += column.total_compressed_size
+                stats = column.statistics
+                stats_repr = (stats.min, stats.max, stats.null_count) if stats is not None and stats.has_min_max else None
+                digest.update(repr((column.path_in_schema, column.total_compressed_size, stats_repr)).encode())
+            fingerprints.append((file_path, i, digest.hexdigest(), compressed))
+    return fingerprints
+
+def frame_content_digest(df):
+    """
+    Content digest of one row group's rows: an order-independent wrapping
+    sum of the 64-bit hashes of all rows, over every column.
+    """
+
+    row_hash = pd.util.hash_array(hash_rows(df))
+    return format(int(row_hash.sum(dtype=np.uint64)), "016x") + f":{len(df)}"
+
+def row_group_content_digest(file_path, index):
+    """
+    Content digest of one row group, read from the file.
+    """
+
+    return frame_content_digest(pq.ParquetFile(file_path).read_row_group(index).to_pandas())
+
+def footer_content_digests(file_path):
+    """
+    Per-row-group content digests stored in the parquet footer by the
+    writer (see generate_mock_data), or None if the file has none.
+    """
+
+    metadata = pq.ParquetFile(file_path).metadata
+    digests = (metadata.metadata or {}).get(DIGEST_METADATA_KEY)
+    if digests is None:
+        return None
+    digests = json.loads(digests)
+    return digests if len(digests) == metadata.num_row_groups else None
+
+def _digest_cache_path(file_path, cache_dir):
+    name = hashlib.sha1(str(Path(file_path).resolve()).encode()).hexdigest()
+    return Path(cache_dir) / f"{name}.json"
+
+def content_digests(file_path, indices, cache_dir=DIGEST_CACHE_DIR):
+    """
+    Content digests of the given row groups of a file.
+
+    Digests written into the footer at generation time are used as they
+    are. Otherwise they are computed by reading the row groups and cached
+    in cache_dir (None disables the cache), keyed by the file's path, size
+    and modification time, so each published version is read in full at
+    most once. Returns the digests and the indices that had to be read.
+    """
+
+    footer = footer_content_digests(file_path)
+    if footer is not None:
+        return {i: footer[i] for i in indices}, []
+
+    stat = file_path.stat()
+    cache_path = _digest_cache_path(file_path, cache_dir) if cache_dir is not None else None
+    cache = {}
+    try:
+        cached = json.loads(cache_path.read_text())
+        if cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns:
+            cache = cached['digests']
+    except (AttributeError, OSError, ValueError, KeyError):
+        pass
+
+    missing = [i for i in indices if str(i) not in cache]
+    for i in missing:
+        cache[str(i)] = row_group_content_digest(file_path, i)
+
+    if missing and cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(json.dumps({
+                'path': str(Path(file_path).resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                'digests': cache,
+            }))
+        except OSError:
+            pass
+    return {i: cache[str(i)] for i in indices}, missing
+
+def _with_content_digests(fingerprints, candidates, cache_dir):
+    """
+    Replace the footer fingerprint of candidate row groups by footer
+    fingerprint + content digest. Returns the new entries and the entries
+    whose content had to be read.
+    """
+
+    by_file = {}
+    for file_path, index, _, _ in fingerprints:
+        if (file_path, index) in candidates:
+            by_file.setdefault(file_path, []).append(index)
+
+    digests, read = {}, set()
+    for file_path, indices in by_file.items():
+        file_digests, read_indices = content_digests(file_path, indices, cache_dir)
+        read.update((file_path, i) for i in read_indices)
+        digests.update({(file_path, i): digest for i, digest in file_digests.items()})
+
+    entries = []
+    for file_path, index, fingerprint, compressed in fingerprints:
+        digest = digests.get((file_path, index))
+        entries.append((file_path, index, f"{fingerprint}/{digest}" if digest else fingerprint, compressed))
+    return entries, [entry for entry in fingerprints if (entry[0], entry[1]) in read]
+
+def _match_fingerprints(old_fingerprints, new_fingerprints):
+    available = {}
+    for entry in old_fingerprints:
+        available.setdefault(entry[2], []).append(entry)
+
+    unmatched_new = []
+    for entry in new_fingerprints:
+        if available.get(entry[2]):
+            available[entry[2]].pop()
+        else:
+            unmatched_new.append(entry)
+
+    unmatched_old = [entry for entries in available.values() for entry in entries]
+    return unmatched_old, unmatched_new
+
+def match_row_groups(old_fingerprints, new_fingerprints, verify=True, cache_dir=DIGEST_CACHE_DIR):
+    """
+    Pair identical row groups between versions (as a multiset, so row
+    groups may move between files). Returns the unmatched old and new
+    entries and the entries read in full to compute content digests.
+
+    Footer fingerprints only prune: a row group without a footer match is
+    certainly different. Footer statistics do not change when values move
+    between rows, so with verify (the default) a footer match only counts
+    once the content digests agree as well. verify=False trusts the footer
+    alone, which is a heuristic and can miss changes.
+
+    Digests come from the footer when the writer stored them, then from
+    the cache in cache_dir; only row groups with neither are read.
+    """
+
+    unmatched_old, unmatched_new = _match_fingerprints(old_fingerprints, new_fingerprints)
+    if not verify:
+        return unmatched_old, unmatched_new, []
+
+    unmatched = {(entry[0], entry[1]) for entry in unmatched_old + unmatched_new}
+    candidates = {(entry[0], entry[1]) for entry in old_fingerprints + new_fingerprints} - unmatched
+    old_fingerprints, old_read = _with_content_digests(old_fingerprints, candidates, cache_dir)
+    new_fingerprints, new_read = _with_content_digests(new_fingerprints, candidates, cache_dir)
+    unmatched_old, unmatched_new = _match_fingerprints(old_fingerprints, new_fingerprints)
+    return unmatched_old, unmatched_new, old_read + new_read
+
+def _read_row_groups(entries, columns):
+    for file_path, index, _, _ in entries:
+        yield pq.ParquetFile(file_path).read_row_group(index, columns=columns).to_pandas()
+
+def read_row_groups(entries, columns):
+    """
+    Read only the given row groups, with read-ahead, into one frame.
+    """
+
+    frames = list(prefetch(_read_row_groups(entries, columns)))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+def key_value_hashes(df, key_columns, value_columns):
+    """
+    64-bit hash of each row's key and of its non-key values.
+    """
+
+    key_hash = hash_rows(df[key_columns])
+    value_hash = hash_rows(df[value_columns]) if value_columns else np.zeros(len(df), dtype=np.uint64)
+    return key_hash, value_hash
+
+def bucket_summaries(key_hash, value_hash, bucket_bits):
+    """
+    Order-independent digest and row count per key-hash range.
+
+    Rows go to one of 2**bucket_bits ranges by the top bits of their key
+    hash; a range's digest is the wrapping sum of a mix of key and value
+    hashes, so two versions of a range agree exactly when (barring hash
+    collisions) they hold the same rows.
+    """
+
+    n_buckets = 1 << bucket_bits
+    bucket = (key_hash >> np.uint64(64 - bucket_bits)).astype(np.int64) if bucket_bits else np.zeros(len(key_hash), dtype=np.int64)
+    mixed = pd.util.hash_array(key_hash ^ pd.util.hash_array(value_hash))
+
+    digest = np.zeros(n_buckets, dtype=np.uint64)
+    order = np.argsort(bucket, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(bucket[order]) != 0]) if len(bucket) else np.empty(0, dtype=np.int64)
+    if len(starts):
+        digest[bucket[order][starts]] = np.add.reduceat(mixed[order], starts)
+    return bucket, digest, np.bincount(bucket, minlength=n_buckets)
+
+def diff_snapshots(old_path, new_path, key_columns=None, bucket_bits=None, verify=True, cache_dir=DIGEST_CACHE_DIR):
+    """
+    Diff two versions of a table by key.
+
+    Descends a Merkle-style tree: footer fingerprints prune the row groups
+    that may be identical, and their content digests confirm it
+    (see match_row_groups); confirmed row groups are not diffed. Rows of
+    the remaining row groups are compared range by range so that only
+    ranges whose digests differ are joined on key. Keys are assumed unique
+    within each version.
+
+    Returns a dict with 'added', 'removed' and 'changed' key frames plus
+    statistics of how much of the data had to be read, digest reads
+    included.
+    """
+
+    old_fingerprints = row_group_fingerprints(old_path)
+    new_fingerprints = row_group_fingerprints(new_path)
+    unmatched_old, unmatched_new, digested = match_row_groups(old_fingerprints, new_fingerprints, verify, cache_dir)
+
+    old_columns = pq.read_schema(parquet_files(old_path)[0]).names
+    new_columns = pq.read_schema(parquet_files(new_path)[0]).names
+    if key_columns is None:
+        key_columns = [col for col in DEFAULT_KEY_COLUMNS if col in old_columns and col in new_columns]
+    value_columns = [col for col in old_columns if col in new_columns and col not in key_columns]
+
+    result = {
+        'key_columns': key_columns,
+        'columns_added': [col for col in new_columns if col not in old_columns],
+        'columns_removed': [col for col in old_columns if col not in new_columns],
+        'row_groups': (len(old_fingerprints), len(new_fingerprints)),
+        'row_groups_read': (len(unmatched_old), len(unmatched_new)),
+        'row_groups_digested': len(digested),
+        'bytes_total': sum(entry[3] for entry in old_fingerprints + new_fingerprints),
+        'bytes_diffed': sum(entry[3] for entry in unmatched_old + unmatched_new),
+        'bytes_digested': sum(entry[3] for entry in digested),
+        'buckets': 0,
+        'buckets_differing': 0,
+    }
+    result['bytes_read'] = result['bytes_diffed'] + result['bytes_digested']
+
+    columns = key_columns + value_columns
+    old_df = read_row_groups(unmatched_old, columns)
+    new_df = read_row_groups(unmatched_new, columns)
+
+    if bucket_bits is None:
+        bucket_bits = int(np.clip(np.log2(max(len(old_df), len(new_df), 1) / 64), 0, 16))
+    old_key, old_value = key_value_hashes(old_df, key_columns, value_columns)
+    new_key, new_value = key_value_hashes(new_df, key_columns, value_columns)
+    old_bucket, old_digest, old_counts = bucket_summaries(old_key, old_value, bucket_bits)
+    new_bucket, new_digest, new_counts = bucket_summaries(new_key, new_value, bucket_bits)
+
+    differing = (old_digest != new_digest) | (old_counts != new_counts)
+    result['buckets'] = len(differing)
+    result['buckets_differing'] = int(differing.sum())
+
+    # Descend only into differing ranges
+    old_rows = np.flatnonzero(differing[old_bucket])
+    new_rows = np.flatnonzero(differing[new_bucket])
+    old_rows = old_rows[np.argsort(old_key[old_rows], kind="stable")]
+    sorted_old_key = old_key[old_rows]
+
+    pos = np.clip(np.searchsorted(sorted_old_key, new_key[new_rows]), 0, max(len(old_rows) - 1, 0))
+    found = (sorted_old_key[pos] == new_key[new_rows]) if len(old_rows) else np.zeros(len(new_rows), dtype=bool)
+    changed = found & (old_value[old_rows[pos]] != new_value[new_rows]) if len(old_rows) else found
+
+    removed = ~np.isin(sorted_old_key, new_key[new_rows])
+
+    result['added'] = new_df.loc[new_rows[~found], key_columns].reset_index(drop=True)
+    result['removed'] = old_df.loc[old_rows[removed], key_columns].reset_index(drop=True)
+    result['changed'] = new_df.loc[new_rows[changed], key_columns].reset_index(drop=True)
+    return result
+
+def report_snapshot_diff(old_path, new_path, key_columns=None, output_path=None, verify=True, cache_dir=DIGEST_CACHE_DIR):
+    """
+    Print a diff between two versions of a table and optionally write the
+    (key..., change) table to parquet.
+    """
+
+    print(f"SNAPSHOT DIFF: {old_path} -> {new_path}")
+    print("="*80)
+
+    result = diff_snapshots(old_path, new_path, key_columns, verify=verify, cache_dir=cache_dir)
+
+    print(f"Key columns: {result['key_columns']}")
+    if result['columns_added'] or result['columns_removed']:
+        print(f"Columns added: {result['columns_added']}, removed: {result['columns_removed']}")
+    print(f"Row groups (old/new): {result['row_groups'][0]} / {result['row_groups'][1]}, "
+          f"read: {result['row_groups_read'][0]} / {result['row_groups_read'][1]}")
+    total = max(result['bytes_total'], 1)
+    if not verify:
+        print("Content verification disabled: footer matches are trusted (heuristic)")
+    elif result['row_groups_digested']:
+        print(f"Row groups read in full to compute content digests: {result['row_groups_digested']} "
+              f"({result['bytes_digested'] / total * 100:.1f}% of the data). They had no digests in their footer "
+              f"or cache, so this run read them in full; later diffs reuse {cache_dir}")
+    print(f"Compressed bytes read: {result['bytes_read']:,} of {result['bytes_total']:,} "
+          f"({result['bytes_read'] / total * 100:.1f}%; diffed {result['bytes_diffed'] / total * 100:.1f}%, "
+          f"digests {result['bytes_digested'] / total * 100:.1f}%)")
+    print(f"Key ranges differing: {result['buckets_differing']:,} of {result['buckets']:,}")
+
+    print(f"\nAdded keys: {len(result['added']):,}")
+    print(f"Removed keys: {len(result['removed']):,}")
+    print(f"Changed keys: {len(result['changed']):,}")
+
+    for change in ['added', 'removed', 'changed']:
+        if len(result[change]):
+            print(f"\nSample of {change} keys:")
+            print(result[change].head(5).to_string(index=False))
+
+    if output_path is not None:
+        changes = pd.concat([result[change].assign(change=change) for change in ['added', 'removed', 'changed']],
+                            ignore_index=True)
+        changes.to_parquet(output_path, index=False)
+        print(f"\nWrote {len(changes):,} changed keys to {output_path}")
+
+    return result
+
+if __name__ == "__main__":
+    import sys
+    result = report_snapshot_diff(sys.argv[1], sys.argv[2])
@@ -0,0 +1,320 @@
+import json
+import re
+from pathlib import Path
+from parquet_stream import open_dataset, discover_tables
+from create_relationship_diagram import RELATIONSHIPS, parse_relationship_keys
+from shap_topk import shap_feature_columns
+
+# Saved reports: name -> (description, SQL with $named parameters, defaults).
+# Views are named after the tables with '-' replaced by '_'; entity_dim is
+# the pre-joined entity dimension, <source>__<target> the relationship
+# views and <shap table>_long the unpivoted SHAP tables registered by
+# connect().
+REPORTS = {
+    'horizon_accuracy': (
+        "MAE, bias and RMSE per Horizon of the residuals since a cycle",
+        """
+        SELECT Horizon, count(*) AS rows, avg(abs(error)) AS mae, avg(error) AS bias,
+               sqrt(avg(error * error)) AS rmse
+        FROM residuals
+        WHERE CAST(Cycle AS TIMESTAMP) >= CAST($min_cycle AS TIMESTAMP)
+        GROUP BY Horizon
+        ORDER BY Horizon
+        """,
+        {'min_cycle': '1900-01-01'},
+    ),
+    'segment_accuracy': (
+        "MAE and bias per segment and Horizon, residuals joined to the entity dimension",
+        """
+        SELECT d.segment_id, r.Horizon, count(*) AS rows, avg(abs(r.error)) AS mae, avg(r.error) AS bias
+        FROM residuals r
+        JOIN entity_dim d USING (Entity)
+        WHERE CAST(r.Cycle AS TIMESTAMP) >= CAST($min_cycle AS TIMESTAMP)
+        GROUP BY ALL
+        ORDER BY ALL
+        """,
+        {'min_cycle': '1900-01-01'},
+    ),
+    'entity_accuracy': (
+        "Accuracy and forecast stability per Horizon for one Entity",
+        """
+        SELECT Horizon, count(*) AS rows, avg(abs(error)) AS mae, avg(error) AS bias,
+               avg(abs(forecast_change)) AS mean_abs_forecast_change
+        FROM residuals__stability
+        WHERE Entity = $entity
+        GROUP BY Horizon
+        ORDER BY Horizon
+        """,
+        {'entity': 1},
+    ),
+    'forecast_instability': (
+        "How forecast revisions relate to errors, per Horizon",
+        """
+        SELECT Horizon, count(*) AS rows, avg(abs(forecast_change)) AS mean_abs_forecast_change,
+               avg(abs(error)) AS mae, corr(abs(forecast_change), abs(error)) AS change_error_corr
+        FROM residuals__stability
+        GROUP BY Horizon
+        ORDER BY Horizon
+        """,
+        {},
+    ),
+    'top_shap_features': (
+        "Top k features by mean |SHAP| over the SHAP table",
+        """
+        SELECT feature, avg(abs(shap_value)) AS mean_abs_shap, count(*) AS rows
+        FROM shap_values_long
+        GROUP BY feature
+        QUALIFY row_number() OVER (ORDER BY avg(abs(shap_value)) DESC) <= $k
+        ORDER BY mean_abs_shap DESC
+        """,
+        {'k': 20},
+    ),
+    'building_block_importance': (
+        "Mean |SHAP| summed per building block",
+        """
+        SELECT m.building_block, count(DISTINCT s.feature) AS features, sum(s.mean_abs_shap) AS total_mean_abs_shap
+        FROM (
+            SELECT feature, avg(abs(shap_value)) AS mean_abs_shap
+            FROM shap_values_long
+            GROUP BY feature
+        ) s
+        JOIN building_block_feature_map m USING (feature)
+        GROUP BY m.building_block
+        ORDER BY total_mean_abs_shap DESC
+        """,
+        {},
+    ),
+}
+
+def _require_duckdb():
+    """
+    Import duckdb on demand; it is only needed for SQL mode.
+    """
+
+    try:
+        import duckdb
+    except ImportError as exc:
+        raise ImportError("SQL mode requires DuckDB: pip install duckdb") from exc
+    return duckdb
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def view_name(table_name):
+    """
+    SQL view name of a table ('live-predictions' -> live_predictions).
+    """
+
+    return table_name.replace("-", "_")
+
+def table_source(path):
+    """
+    read_parquet() expression for a file or a partitioned directory.
+    """
+
+    path = Path(path)
+    pattern = str(path / "*.parquet") if path.is_dir() else str(path)
+    return f"read_parquet('{pattern.replace(chr(39), chr(39) * 2)}')"
+
+def _join_columns(seen, alias, view, columns, skip=()):
+    """
+    Select expressions for a joined table's columns; names already taken
+    by an earlier table are prefixed with the view name.
+    """
+
+    expressions = []
+    for col in columns:
+        if col in skip:
+            continue
+        name = f"{view}_{col}" if col in seen else col
+        expressions.append(f"{alias}.{_quote(col)}" + (f" AS {_quote(name)}" if name != col else ""))
+        seen.add(name)
+    return expressions
+
+def relationship_view_sql(source, target, key, columns):
+    """
+    CREATE VIEW statement joining the two tables of a relationship.
+    """
+
+    source_cols, target_cols = parse_relationship_keys(key)
+    source_view, target_view = view_name(source), view_name(target)
+    seen = set()
+    select = _join_columns(seen, "s", source_view, columns[source])
+    same_name = [t for s, t in zip(source_cols, target_cols) if s == t]
+    select += _join_columns(seen, "t", target_view, columns[target], skip=same_name)
+    on = " AND ".join(f"s.{_quote(s)} = t.{_quote(t)}" for s, t in zip(source_cols, target_cols))
+
+    return (f"CREATE OR REPLACE VIEW {_quote(f'{source_view}__{target_view}')} AS "
+            f"SELECT {', '.join(select)} FROM {_quote(source_view)} s JOIN {_quote(target_view)} t ON {on}")
+
+def entity_dimension_sql(columns):
+    """
+    CREATE VIEW statement for entity_dim: the entity table left-joined to
+    every dimension reachable from it in RELATIONSHIPS (tables without a
+    Marker column). Joined tables are reduced to one row per join key so
+    entity_dim keeps exactly one row per Entity.
+    """
+
+    aliases = {'entity': 'e'}
+    seen = set()
+    select = _join_columns(seen, "e", "entity", columns['entity'])
+    joins = []
+
+    for i, (source, target, key) in enumerate(RELATIONSHIPS):
+        if source not in aliases or target in aliases or target not in columns or 'Marker' in columns[target]:
+            continue
+
+        alias = f"d{i}"
+        aliases[target] = alias
+        source_cols, target_cols = parse_relationship_keys(key)
+        partition = ", ".join(_quote(col) for col in target_cols)
+        order = ", ".join(_quote(col) for col in columns[target])
+        relation = (f"(SELECT * FROM {_quote(view_name(target))} "
+                    f"QUALIFY row_number() OVER (PARTITION BY {partition} ORDER BY {order}) = 1)")
+        on = " AND ".join(f"{aliases[source]}.{_quote(s)} = {alias}.{_quote(t)}" for s, t in zip(source_cols, target_cols))
+        joins.append(f"LEFT JOIN {relation} {alias} ON {on}")
+
+        same_name = [t for s, t in zip(source_cols, target_cols) if s == t]
+        select += _join_columns(seen, alias, view_name(target), columns[target], skip=same_name)
+
+    return f"CREATE OR REPLACE VIEW entity_dim AS SELECT {', '.join(select)} FROM entity e {' '.join(joins)}"
+
+def shap_long_view_sql(table_name, path):
+    """
+    CREATE VIEW statement unpivoting a SHAP table to (keys..., feature,
+    shap_value). Key and feature columns come from the table's schema, so
+    an optional Cycle key is never mistaken for a feature.
+    """
+
+    keys, features = shap_feature_columns(path)
+    return (f"CREATE OR REPLACE VIEW {_quote(view_name(table_name) + '_long')} AS "
+            f"SELECT {', '.join(_quote(col) for col in keys)}, feature, shap_value "
+            f"FROM (UNPIVOT {_quote(view_name(table_name))} ON {', '.join(_quote(col) for col in features)} "
+            f"INTO NAME feature VALUE shap_value)")
+
+def connect(data_dir="mock_data", database=":memory:", threads=None, memory_limit=None, temp_directory=None):
+    """
+    Open a DuckDB connection with a view per table, a view per relationship,
+    the pre-joined entity_dim view and a long view per SHAP table.
+
+    Views read the parquet files lazily, so queries are planned across all
+    tables and run on DuckDB's thread pool. With memory_limit and
+    temp_directory set, large joins and aggregations spill to disk instead
+    of failing.
+    """
+
+    duckdb = _require_duckdb()
+    con = duckdb.connect(database)
+    if threads is not None:
+        con.execute(f"SET threads = {int(threads)}")
+    if memory_limit is not None:
+        con.execute(f"SET memory_limit = '{memory_limit}'")
+    if temp_directory is not None:
+        con.execute(f"SET temp_directory = '{temp_directory}'")
+    # Ordering is not needed for analytical results and costs memory when spilling
+    con.execute("SET preserve_insertion_order = false")
+
+    tables = discover_tables(data_dir)
+    columns = {}
+    for table_name, path in tables.items():
+        columns[table_name] = open_dataset(path).schema.names
+        con.execute(f"CREATE OR REPLACE VIEW {_quote(view_name(table_name))} AS SELECT * FROM {table_source(path)}")
+
+    for source, target, key in RELATIONSHIPS:
+        if source in columns and target in columns:
+            con.execute(relationship_view_sql(source, target, key, columns))
+
+    if 'entity' in columns:
+        con.execute(entity_dimension_sql(columns))
+
+    for table_name, path in tables.items():
+        if "shap" in table_name:
+            con.execute(shap_long_view_sql(table_name, path))
+
+    return con
+
+def load_report_file(path):
+    """
+    Read a saved report from a .sql file. Parameter defaults may be given
+    in leading comment lines of the form '-- param: name = value'.
+    """
+
+    sql = Path(path).read_text()
+    defaults = {}
+    for match in re.finditer(r"^--\s*param:\s*(\w+)\s*=\s*(.+)$", sql, flags=re.MULTILINE):
+        defaults[match.group(1)] = parse_param_value(match.group(2).strip())
+    return sql, defaults
+
+def parse_param_value(value):
+    """
+    Interpret a parameter given on the command line: numbers and JSON
+    literals keep their type, anything else is a string.
+    """
+
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def run_query(con, sql, params=None):
+    """
+    Execute SQL with $named parameters and return a pandas DataFrame. Only
+    parameters referenced by the query are bound.
+    """
+
+    used = set(re.findall(r"\$(\w+)", sql))
+    missing = used - set(params or {})
+    if missing:
+        raise ValueError(f"Missing report parameter(s): {', '.join(sorted(missing))}")
+    bound = {name: value for name, value in (params or {}).items() if name in used}
+    return con.execute(sql, bound).df() if bound else con.execute(sql).df()
+
+def run_sql(data_dir="mock_data", query=None, report=None, report_file=None, params=None, threads=None,
+            memory_limit=None, temp_directory=None, output_path=None, max_rows=50):
+    """
+    Run an ad-hoc query, a saved report or a report file against the
+    tables and print the result.
+    """
+
+    if report is not None:
+        description, sql, defaults = REPORTS[report]
+        print(f"REPORT: {report} - {description}")
+    elif report_file is not None:
+        sql, defaults = load_report_file(report_file)
+        print(f"REPORT: {report_file}")
+    elif query is not None:
+        sql, defaults = query, {}
+    else:
+        raise ValueError("Provide a query, a report name or a report file")
+    print("="*80)
+
+    params = {**defaults, **(params or {})}
+    con = connect(data_dir, threads=threads, memory_limit=memory_limit, temp_directory=temp_directory)
+    result = run_query(con, sql, params)
+
+    print(f"Rows: {len(result):,}")
+    print(result.head(max_rows).to_string(index=False))
+
+    if output_path is not None:
+        result.to_parquet(output_path, index=False)
+        print(f"\nWrote {len(result):,} rows to {output_path}")
+
+    return result
+
+def list_views(data_dir="mock_data"):
+    """
+    Print the views registered for a data directory and the saved reports.
+    """
+
+    con = connect(data_dir)
+    print("Views:")
+    for (name,) in con.execute("SELECT view_name FROM duckdb_views() WHERE NOT internal ORDER BY view_name").fetchall():
+        print(f"  {name}")
+
+    print("\nSaved reports:")
+    for name, (description, sql, defaults) in REPORTS.items():
+        params = ", ".join(f"{key}={value!r}" for key, value in defaults.items())
+        print(f"  {name}: {description}" + (f" [{params}]" if params else ""))
+
+if __name__ == "__main__":
+    list_views()
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from check_duplicates import find_duplicates
+
+def _table(path, n_rows=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Entity': rng.integers(0, 50, n_rows),
+        'Marker': rng.choice(["a", "b", "c", "d"], n_rows),
+        'value': rng.normal(size=n_rows),
+    })
+    df.to_parquet(path, index=False)
+    return df
+
+def test_confirm_is_exact_with_partitioned_candidates(tmp_path):
+    df = _table(tmp_path / "t.parquet")
+
+    # Nearly every row is a candidate, so the 1 MB budget forces several partitions
+    result = find_duplicates(tmp_path / "t.parquet", subset=['Entity', 'Marker'], memory_limit_mb=1, batch_size=16384)
+
+    assert result['confirmed']
+    assert result['duplicates'] == int(df[['Entity', 'Marker']].duplicated().sum())
+
+def test_no_repeated_hash_is_exact(tmp_path):
+    _table(tmp_path / "t.parquet")
+
+    result = find_duplicates(tmp_path / "t.parquet", confirm=False)
+
+    assert result['duplicates'] == 0
+    assert result['confirmed']
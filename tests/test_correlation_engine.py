@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from correlation_engine import MomentAccumulator, accumulate_moments
+
+def _frame(n_rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n_rows, 4)), columns=['observed', 'forecasted', 'error', 'sparse'])
+    df['forecasted'] += df['observed']
+    df['error'] = df['forecasted'] - df['observed'] + rng.normal(size=n_rows)
+    df.loc[rng.random(n_rows) < 0.9, 'sparse'] = np.nan
+    df.loc[rng.random(n_rows) < 0.1, 'error'] = np.nan
+    return df
+
+def test_matches_pandas_pairwise_complete_correlation(tmp_path):
+    df = _frame()
+    df.to_parquet(tmp_path / "t.parquet", index=False)
+
+    acc = accumulate_moments(tmp_path / "t.parquet", batch_size=700)
+
+    pd.testing.assert_frame_equal(acc.correlation(), df.corr(), atol=1e-10)
+    assert acc.rows == len(df)
+    assert acc.complete_rows == int(df.notna().all(axis=1).sum())
+
+def test_merge_equals_single_pass():
+    df = _frame(seed=1)
+    merged = MomentAccumulator(df.columns).update(df.iloc[:1234])
+    merged.merge(MomentAccumulator(df.columns).update(df.iloc[1234:]))
+
+    pd.testing.assert_frame_equal(merged.covariance(), df.cov(), rtol=1e-8)
+    pd.testing.assert_frame_equal(merged.correlation(), MomentAccumulator(df.columns).update(df).correlation(), atol=1e-12)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from drift_monitor import ReferenceHistograms, make_bin_edges
+
+def _forecasts(n_per_horizon, seed, scale=1.0):
+    rng = np.random.default_rng(seed)
+    horizons = np.repeat(np.arange(1, 5), n_per_horizon)
+    return pd.DataFrame({
+        'Entity': rng.integers(1, 1000, len(horizons)),
+        'Horizon': horizons,
+        'forecasted': rng.gamma(2.0, 150.0 + 10 * horizons) * scale,
+    })
+
+def _reference():
+    history = _forecasts(20_000, seed=0)
+    return ReferenceHistograms(make_bin_edges(history['forecasted'].max())).update(history)
+
+def test_same_distribution_sample_is_not_flagged():
+    reference = _reference()
+    for n_per_horizon in [60, 300, 5_000]:
+        batch = _forecasts(n_per_horizon, seed=n_per_horizon)
+        result = reference.compare(reference.histogram(batch))
+        assert not result['drift'].any(), result
+
+def test_shifted_sample_is_flagged():
+    reference = _reference()
+    batch = _forecasts(300, seed=1, scale=1.5)
+    result = reference.compare(reference.histogram(batch))
+    assert result['drift'].all(), result
+
+def test_tiny_groups_are_not_judged():
+    reference = _reference()
+    batch = _forecasts(10, seed=2, scale=3.0)
+    result = reference.compare(reference.histogram(batch))
+    assert not result['sufficient'].any()
+    assert not result['drift'].any()
+
+def test_batch_is_folded_only_once(tmp_path):
+    reference = _reference()
+    batch_counts = reference.histogram(_forecasts(100, seed=3))
+    before = reference.counts.sum()
+
+    assert reference.fold_batch(batch_counts, "batch-a")
+    reference.save(tmp_path / "reference.npz")
+    reloaded = ReferenceHistograms.load(tmp_path / "reference.npz")
+
+    assert not reloaded.fold_batch(batch_counts, "batch-a")
+    assert reloaded.counts.sum() == before + batch_counts.sum()
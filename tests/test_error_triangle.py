@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from error_triangle import ErrorTriangle
+
+def _cycle(cycle, n_entities=10, seed=0):
+    rng = np.random.default_rng(seed)
+    entity, horizon = np.meshgrid(np.arange(1, n_entities + 1), np.arange(1, 4), indexing="ij")
+    return pd.DataFrame({
+        'Entity': entity.ravel(),
+        'Cycle': pd.Timestamp(cycle),
+        'Horizon': horizon.ravel(),
+        'error': rng.normal(0, 5, entity.size),
+    })
+
+def _rows(triangle):
+    return int(triangle.sums[-1].sum())
+
+def test_append_parquet_is_idempotent(tmp_path):
+    triangle = ErrorTriangle().append(_cycle("2024-01-01"))
+    _cycle("2024-01-08", seed=1).to_parquet(tmp_path / "new.parquet", index=False)
+
+    assert triangle.append_parquet(tmp_path / "new.parquet") == 30
+    triangle.save(tmp_path / "triangle.npz")
+    reloaded = ErrorTriangle.load(tmp_path / "triangle.npz")
+
+    assert reloaded.append_parquet(tmp_path / "new.parquet") is None
+    assert _rows(reloaded) == 60
+
+def test_existing_cycle_is_rejected_or_replaced(tmp_path):
+    triangle = ErrorTriangle().append(_cycle("2024-01-01"))
+    revised = _cycle("2024-01-01", n_entities=5, seed=2)
+    revised.to_parquet(tmp_path / "revised.parquet", index=False)
+
+    with pytest.raises(ValueError):
+        triangle.append_parquet(tmp_path / "revised.parquet")
+    assert _rows(triangle) == 30
+
+    triangle.append_parquet(tmp_path / "revised.parquet", replace=True)
+    assert _rows(triangle) == 15
+    assert np.allclose(triangle.bias()[0], revised.groupby('Horizon')['error'].mean())
+
+def test_new_marker_delta_on_existing_cycles_is_additive(tmp_path):
+    full = pd.concat([_cycle("2024-01-01"), _cycle("2024-01-08", seed=1)], ignore_index=True)
+    full['Marker'] = full['Cycle'] + pd.to_timedelta(full['Horizon'] * 7, unit="D")
+    # A newly observed Marker adds one Horizon cell to each Cycle that forecast it
+    observed = full['Marker'] == pd.Timestamp("2024-01-22")
+    full[observed].to_parquet(tmp_path / "delta.parquet", index=False)
+
+    triangle = ErrorTriangle().append(full[~observed])
+    assert triangle.append_parquet(tmp_path / "delta.parquet") == int(observed.sum())
+
+    rebuilt = ErrorTriangle().append(full)
+    np.testing.assert_allclose(triangle.sums, rebuilt.sums)
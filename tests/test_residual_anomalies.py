@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from residual_anomalies import detect_anomalies
+
+def _residuals_with_spikes(path, n_entities=200, n_markers=100, n_spikes=100, seed=0):
+    rng = np.random.default_rng(seed)
+    entity, marker = np.meshgrid(np.arange(1, n_entities + 1), np.arange(n_markers), indexing="ij")
+    error = rng.normal(0, 10, entity.size)
+    spikes = rng.choice(entity.size, n_spikes + 1, replace=False)
+    error[spikes[:-1]] = 80.0 * rng.choice([-1, 1], n_spikes)
+    error[spikes[-1]] = 1e9
+    pd.DataFrame({
+        'Entity': entity.ravel(),
+        'Marker': pd.Timestamp("2024-01-01") + pd.to_timedelta(marker.ravel() * 7, unit="D"),
+        'Horizon': 1,
+        'error': error,
+    }).to_parquet(path, index=False)
+
+def test_extreme_outlier_does_not_blunt_the_sketch(tmp_path):
+    _residuals_with_spikes(tmp_path / "residuals.parquet")
+
+    sketch, sketch_stats = detect_anomalies(tmp_path / "residuals.parquet", method='sketch')
+    exact, exact_stats = detect_anomalies(tmp_path / "residuals.parquet", method='exact')
+
+    assert len(exact) == 101
+    assert len(sketch) == len(exact)
+    assert abs(sketch_stats['scale'].median() / exact_stats['scale'].median() - 1) < 0.1
@@ -0,0 +1,14 @@
+import numpy as np
+import pandas as pd
+from shap_topk import top_shap_frame
+
+def test_rank_does_not_wrap_for_large_k():
+    rng = np.random.default_rng(0)
+    features = [f"f{i}" for i in range(300)]
+    batch = pd.DataFrame(rng.normal(size=(4, 300)), columns=features).assign(Entity=np.arange(4))
+
+    frame = top_shap_frame(batch, ['Entity'], features, 150, np.zeros(300, dtype=np.int32), np.array(["x"], dtype=object))
+
+    assert frame['rank'].min() == 1
+    assert frame['rank'].max() == 150
+    assert (frame.groupby('Entity')['shap_value'].apply(lambda v: np.all(np.diff(np.abs(v)) <= 0))).all()
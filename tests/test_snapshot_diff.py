@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from generate_mock_data import generate_mock_data
+from snapshot_diff import diff_snapshots
+
+def _residuals(n_entities=50, n_horizons=4):
+    entity, horizon = np.meshgrid(np.arange(1, n_entities + 1), np.arange(1, n_horizons + 1), indexing="ij")
+    rng = np.random.default_rng(0)
+    observed = rng.gamma(2.0, 50.0, entity.size)
+    forecasted = observed + rng.normal(0, 10, entity.size)
+    return pd.DataFrame({
+        'Entity': entity.ravel(),
+        'Cycle': pd.Timestamp("2024-01-01"),
+        'Marker': pd.Timestamp("2024-01-01") + pd.to_timedelta(horizon.ravel() * 7, unit="D"),
+        'Horizon': horizon.ravel(),
+        'observed': observed,
+        'forecasted': forecasted,
+        'error': observed - forecasted,
+    })
+
+@pytest.mark.parametrize("compression", ["none", "snappy", "zstd"])
+def test_swapped_values_in_one_row_group_are_reported(tmp_path, compression):
+    old = _residuals()
+    new = old.copy()
+    # Swapping the values of two adjacent keys leaves every footer statistic unchanged
+    value_cols = ['observed', 'forecasted', 'error']
+    new.loc[[10, 11], value_cols] = new.loc[[11, 10], value_cols].to_numpy()
+
+    old.to_parquet(tmp_path / "old.parquet", index=False, compression=compression, row_group_size=50)
+    new.to_parquet(tmp_path / "new.parquet", index=False, compression=compression, row_group_size=50)
+
+    result = diff_snapshots(tmp_path / "old.parquet", tmp_path / "new.parquet", cache_dir=tmp_path / "cache")
+
+    assert len(result['changed']) == 2
+    assert set(result['changed']['Entity']) == set(old.loc[[10, 11], 'Entity'])
+    assert len(result['added']) == 0 and len(result['removed']) == 0
+    assert result['row_groups_read'] == (1, 1)
+
+def test_identical_versions_reuse_cached_digests(tmp_path):
+    df = _residuals()
+    df.to_parquet(tmp_path / "old.parquet", index=False, row_group_size=50)
+    df.to_parquet(tmp_path / "new.parquet", index=False, row_group_size=50)
+
+    first = diff_snapshots(tmp_path / "old.parquet", tmp_path / "new.parquet", cache_dir=tmp_path / "cache")
+    second = diff_snapshots(tmp_path / "old.parquet", tmp_path / "new.parquet", cache_dir=tmp_path / "cache")
+
+    assert first['row_groups_read'] == (0, 0)
+    assert len(first['changed']) == 0
+    assert first['row_groups_digested'] == 8
+    assert first['bytes_read'] == first['bytes_total']
+    assert second['row_groups_digested'] == 0
+    assert second['bytes_read'] == 0
+    # The cache lives outside the data directory
+    assert sorted(p.name for p in tmp_path.glob("*.parquet*")) == ["new.parquet", "old.parquet"]
+
+def test_generated_tables_carry_their_digests(tmp_path):
+    pd.DataFrame({'Entity': np.arange(1, 21)}).to_parquet(tmp_path / "entity.parquet", index=False)
+    generate_mock_data(tmp_path / "v1", data_dir=tmp_path, tables=['residuals'], n_cycles=8, n_horizons=3,
+                       n_partitions=2, max_workers=1, row_group_size=40, copy_dimensions=False)
+    generate_mock_data(tmp_path / "v2", data_dir=tmp_path, tables=['residuals'], n_cycles=8, n_horizons=3,
+                       n_partitions=2, max_workers=1, row_group_size=40, copy_dimensions=False)
+
+    result = diff_snapshots(tmp_path / "v1" / "residuals", tmp_path / "v2" / "residuals", cache_dir=tmp_path / "cache")
+
+    assert result['row_groups_read'] == (0, 0)
+    assert result['row_groups_digested'] == 0
+    assert result['bytes_read'] == 0
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+import sql_mode
+
+def _write_tables(data_dir):
+    rng = np.random.default_rng(0)
+    entities = np.arange(1, 21)
+    pd.DataFrame({'Entity': entities, 'SKU_ID': entities % 5, 'Warehouse_ID': entities % 2}).to_parquet(
+        data_dir / "entity.parquet", index=False)
+    pd.DataFrame({'SKU_ID': np.arange(5), 'Price': rng.uniform(1, 5, 5)}).to_parquet(
+        data_dir / "sku-colddirnks.parquet", index=False)
+    # Two segments for one entity: entity_dim must still have one row per Entity
+    pd.DataFrame({'Entity': np.r_[entities, 1], 'segment_id': np.r_[entities % 3, 2]}).to_parquet(
+        data_dir / "segmentation-entity.parquet", index=False)
+
+    entity, cycle, horizon = np.meshgrid(entities, np.arange(4), np.arange(1, 4), indexing="ij")
+    cycle = pd.Timestamp("2024-01-01") + pd.to_timedelta(cycle.ravel() * 7, unit="D")
+    keys = pd.DataFrame({
+        'Entity': entity.ravel(), 'Cycle': cycle,
+        'Marker': cycle + pd.to_timedelta(horizon.ravel() * 7, unit="D"), 'Horizon': horizon.ravel(),
+    })
+    keys.assign(error=rng.normal(0, 5, len(keys))).to_parquet(data_dir / "residuals.parquet", index=False)
+    keys.assign(forecast_change=rng.normal(0, 2, len(keys))).to_parquet(data_dir / "stability.parquet", index=False)
+
+    features = {f"feature_{i:03d}": rng.normal(0, 1.0 / (i + 1), len(keys)).astype(np.float32) for i in range(6)}
+    # SHAP table with a Cycle key column, which must not be unpivoted as a feature
+    keys.assign(**features).to_parquet(data_dir / "shap_values.parquet", index=False)
+    pd.DataFrame({'feature': list(features), 'building_block': ['price', 'season'] * 3}).to_parquet(
+        data_dir / "building-block-feature-map.parquet", index=False)
+    pd.DataFrame({'name': ['price', 'season']}).to_parquet(data_dir / "building-blocks.parquet", index=False)
+    return keys
+
+@pytest.fixture
+def con(tmp_path):
+    _write_tables(tmp_path)
+    return sql_mode.connect(tmp_path, threads=2, memory_limit="512MB", temp_directory=str(tmp_path / "spill"))
+
+@pytest.mark.parametrize("report", sorted(sql_mode.REPORTS))
+def test_saved_reports_run(con, report):
+    _, sql, defaults = sql_mode.REPORTS[report]
+    result = sql_mode.run_query(con, sql, defaults)
+    assert len(result) > 0
+
+def test_entity_dim_has_one_row_per_entity(con):
+    rows, entities = con.execute("SELECT count(*), count(DISTINCT Entity) FROM entity_dim").fetchone()
+    assert rows == entities == 20
+
+def test_shap_long_view_excludes_cycle(con):
+    features = {row[0] for row in con.execute("SELECT DISTINCT feature FROM shap_values_long").fetchall()}
+    assert features == {f"feature_{i:03d}" for i in range(6)}
+
+def test_report_parameters_are_bound(con):
+    _, sql, _ = sql_mode.REPORTS['horizon_accuracy']
+    everything = sql_mode.run_query(con, sql, {'min_cycle': '1900-01-01'})
+    recent = sql_mode.run_query(con, sql, {'min_cycle': '2024-01-15'})
+    assert everything['rows'].sum() == 240
+    assert recent['rows'].sum() == 120
+    with pytest.raises(ValueError):
+        sql_mode.run_query(con, sql, {})
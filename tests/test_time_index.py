@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from time_index import MarkerTimeIndex
+
+def _residuals(n_cycles=6, n_entities=8, n_horizons=3, seed=0):
+    """
+    Residuals as published after n_cycles: only markers up to the last
+    Cycle have been observed, so each new Cycle adds rows to earlier ones.
+    """
+
+    rng = np.random.default_rng(seed)
+    entity, cycle, horizon = np.meshgrid(np.arange(1, n_entities + 1), np.arange(n_cycles),
+                                         np.arange(1, n_horizons + 1), indexing="ij")
+    entity, cycle, horizon = entity.ravel(), cycle.ravel(), horizon.ravel()
+    keep = cycle + horizon <= n_cycles - 1
+    entity, cycle, horizon = entity[keep], cycle[keep], horizon[keep]
+    start = pd.Timestamp("2024-01-01")
+    error = rng.normal(0, 5, entity.size)
+    return pd.DataFrame({
+        'Entity': entity, 'Cycle': start + pd.to_timedelta(cycle * 7, unit="D"),
+        'Marker': start + pd.to_timedelta((cycle + horizon) * 7, unit="D"), 'Horizon': horizon,
+        'error': error, 'absolute_error': np.abs(error),
+    }).sort_values(['Cycle', 'Entity']).reset_index(drop=True)
+
+def test_persisted_index_picks_up_newly_observed_markers(tmp_path):
+    after = _residuals(n_cycles=7)
+    before = after[after['Marker'] < after['Marker'].max()]
+    before.to_parquet(tmp_path / "residuals.parquet", index=False, row_group_size=24)
+
+    index = MarkerTimeIndex.from_parquet(tmp_path / "residuals.parquet")
+    index.save(tmp_path / "index.npz")
+
+    # The new Marker adds rows to every earlier Cycle that forecast it
+    after.to_parquet(tmp_path / "residuals.parquet", index=False, row_group_size=24)
+    loaded = MarkerTimeIndex.load(tmp_path / "index.npz")
+    assert loaded.append_new_markers(tmp_path / "residuals.parquet") == len(after) - len(before)
+    assert loaded.append_new_markers(tmp_path / "residuals.parquet") == 0
+
+    full = MarkerTimeIndex.from_frame(after)
+    assert loaded.count.sum() == len(after)
+    pd.testing.assert_frame_equal(loaded.rolling(3), full.rolling(3))
+
+def test_append_parquet_applies_a_file_once(tmp_path):
+    df = _residuals()
+    last = df['Marker'].max()
+    index = MarkerTimeIndex.from_frame(df[df['Marker'] < last])
+    df[df['Marker'] == last].to_parquet(tmp_path / "new.parquet", index=False)
+
+    assert index.append_parquet(tmp_path / "new.parquet") > 0
+    assert index.append_parquet(tmp_path / "new.parquet") is None
+    assert index.count.sum() == len(df)
@@ -0,0 +1,413 @@
+import pandas as pd
+import numpy as np
+import json
+import pyarrow as pa
+import pyarrow.compute as pc
+from parquet_stream import resolve_table_path, iter_parquet_batches, open_dataset, batch_fingerprint
+
+def to_epoch_seconds(values):
+    """
+    Convert a Marker/Cycle column (strings, datetimes or int epoch seconds)
+    to int64 epoch seconds.
+    """
+
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values):
+        return values.to_numpy(dtype=np.int64)
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values)
+    return values.to_numpy().astype("datetime64[s]").astype(np.int64)
+
+# Residual columns the index is built from
+INDEX_COLUMNS = ['Entity', 'Marker', 'Horizon', 'error', 'absolute_error']
+
+def later_than_filter(path, column, after):
+    """
+    pyarrow filter selecting rows whose Marker/Cycle column is later than
+    `after` (epoch seconds), or None when the column type cannot be
+    compared directly (e.g. strings) and rows must be filtered after
+    decoding.
+    """
+
+    field = open_dataset(path).schema.field(column)
+    if pa.types.is_timestamp(field.type):
+        value = pa.scalar(int(after), pa.timestamp('s')).cast(pa.timestamp(field.type.unit))
+        if field.type.tz is not None:
+            value = pa.scalar(value.value, field.type)
+        return pc.field(column) > value
+    if pa.types.is_date(field.type):
+        return pc.field(column) > pa.scalar(pd.Timestamp(int(after), unit='s').date(), field.type)
+    if pa.types.is_integer(field.type):
+        return pc.field(column) > int(after)
+    return None
+
+def _aggregate_markers(entity, marker, error, abs_error, count=None):
+    """
+    Collapse rows to one entry per (Entity, Marker), sorted, with summed
+    error, absolute error and row count (count defaults to one per row).
+    """
+
+    if count is None:
+        count = np.ones(len(entity), dtype=np.int64)
+
+    order = np.lexsort((marker, entity))
+    entity, marker = entity[order], marker[order]
+    starts = np.flatnonzero(np.r_[True, (entity[1:] != entity[:-1]) | (marker[1:] != marker[:-1])])
+    if len(entity) == 0:
+        starts = starts[:0]
+
+    def combine(values):
+        values = values[order]
+        return np.add.reduceat(values, starts) if len(starts) else values
+
+    return entity[starts], marker[starts], combine(error), combine(abs_error), combine(count)
+
+def _segment_cumsum(values, segment_starts):
+    """
+    Cumulative sum that restarts at every segment start.
+    """
+
+    cum = np.cumsum(values)
+    offsets = np.repeat(cum[segment_starts] - values[segment_starts], np.diff(np.r_[segment_starts, len(values)]))
+    return cum - offsets
+
+class MarkerTimeIndex:
+    """
+    Per-Entity time index over residuals.
+
+    Holds one entry per (Entity, Marker) with Marker as int64 epoch seconds,
+    sorted within each Entity, plus per-entity running sums of error,
+    absolute error and counts. A rolling window over the last N markers is
+    then a difference of two running sums (O(1) per marker), and time
+    window lookups are binary searches on a sorted (Entity, Marker) key.
+
+    Entries pool every Cycle that forecast the Marker. Residual rows only
+    appear once their Marker is observed, and then for every Cycle at once,
+    so the newest indexed Marker (last_marker) is what a persisted index
+    picks up from; sources holds the fingerprints of files appended with
+    append_parquet().
+    """
+
+    def __init__(self, entity, marker, error_sum, abs_error_sum, count, sources=None):
+        self.entity = entity
+        self.marker = marker
+        self.error_sum = error_sum
+        self.abs_error_sum = abs_error_sum
+        self.count = count
+        self.sources = list(sources or [])
+        self._build_running_sums()
+
+    @classmethod
+    def from_frame(cls, df, horizon=None):
+        """
+        Build the index from a residuals frame, optionally for one Horizon.
+        """
+
+        if horizon is not None:
+            df = df[df['Horizon'] == horizon]
+        return cls(*_aggregate_markers(
+            df['Entity'].to_numpy(dtype=np.int64),
+            to_epoch_seconds(df['Marker']),
+            df['error'].to_numpy(dtype=np.float64),
+            df['absolute_error'].to_numpy(dtype=np.float64),
+        ))
+
+    @classmethod
+    def from_parquet(cls, path, horizon=None, batch_size=1_000_000):
+        """
+        Build the index by streaming a residuals table, aggregating each
+        batch before merging so memory scales with (Entity, Marker) pairs
+        rather than rows.
+        """
+
+        index = None
+        for batch in iter_parquet_batches(path, INDEX_COLUMNS, batch_size):
+            batch_index = cls.from_frame(batch, horizon)
+            index = batch_index if index is None else index.merge(batch_index)
+        return index
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved with save(); no datetime parsing is needed.
+        """
+
+        data = np.load(path)
+        sources = json.loads(str(data['sources'])) if 'sources' in data else []
+        return cls(data['entity'], data['marker'], data['error_sum'], data['abs_error_sum'], data['count'], sources)
+
+    def save(self, path):
+        """
+        Save the index arrays to an .npz file.
+        """
+
+        np.savez(
+            path, entity=self.entity, marker=self.marker, error_sum=self.error_sum,
+            abs_error_sum=self.abs_error_sum, count=self.count, sources=np.array(json.dumps(self.sources)),
+        )
+
+    @property
+    def last_marker(self):
+        """
+        Newest indexed Marker (epoch seconds), or None for an empty index.
+        """
+
+        return int(self.marker.max()) if len(self.marker) else None
+
+    def _build_running_sums(self):
+        n = len(self.entity)
+        self.segment_starts = np.flatnonzero(np.r_[True, self.entity[1:] != self.entity[:-1]]) if n else np.empty(0, dtype=np.int64)
+        self.entities = self.entity[self.segment_starts]
+        self.offsets = np.r_[self.segment_starts, n]
+        self.segment_start_of = np.repeat(self.segment_starts, np.diff(self.offsets))
+
+        if n:
+            self.cum_error = _segment_cumsum(self.error_sum, self.segment_starts)
+            self.cum_abs_error = _segment_cumsum(self.abs_error_sum, self.segment_starts)
+            self.cum_count = _segment_cumsum(self.count, self.segment_starts)
+        else:
+            self.cum_error = self.cum_abs_error = np.empty(0)
+            self.cum_count = np.empty(0, dtype=np.int64)
+        self._keys = None
+
+    def merge(self, other):
+        """
+        Merge another index (e.g. from another batch), combining entries for
+        the same (Entity, Marker). Returns a new index.
+        """
+
+        return MarkerTimeIndex(*_aggregate_markers(
+            np.r_[self.entity, other.entity],
+            np.r_[self.marker, other.marker],
+            np.r_[self.error_sum, other.error_sum],
+            np.r_[self.abs_error_sum, other.abs_error_sum],
+            np.r_[self.count, other.count],
+        ), sources=self.sources)
+
+    def append(self, df, horizon=None):
+        """
+        Add newly arrived residual rows in place.
+
+        When every new marker is later than the entity's last indexed marker
+        (the normal case for a newly observed Marker), the new entries are
+        inserted at the end of their entity segments and their running sums
+        continue from the segment's last value, so existing entries are not
+        recomputed. Otherwise the index falls back to a full merge.
+        Returns an index of just the new entries; new.marker.min() can be
+        passed to rolling(since=...) to refresh only the new markers.
+        """
+
+        new = MarkerTimeIndex.from_frame(df, horizon)
+        if len(new.entity) == 0:
+            return new
+
+        seg = np.searchsorted(self.entities, new.entity)
+        known = (seg < len(self.entities)) & (self.entities[np.minimum(seg, len(self.entities) - 1)] == new.entity)
+        last_marker = np.where(known, self.marker[self.offsets[np.minimum(seg + 1, len(self.offsets) - 1)] - 1], np.iinfo(np.int64).min)
+
+        if not (new.marker > last_marker).all() or not known.all():
+            merged = self.merge(new)
+            self.__init__(merged.entity, merged.marker, merged.error_sum, merged.abs_error_sum, merged.count, self.sources)
+            return new
+
+        # Fast path: continue each entity's running sums from its last entry
+        insert_at = self.offsets[seg + 1]
+        base = insert_at - 1
+        cum_error = self.cum_error[base] + new.cum_error
+        cum_abs_error = self.cum_abs_error[base] + new.cum_abs_error
+        cum_count = self.cum_count[base] + new.cum_count
+
+        self.entity = np.insert(self.entity, insert_at, new.entity)
+        self.marker = np.insert(self.marker, insert_at, new.marker)
+        self.error_sum = np.insert(self.error_sum, insert_at, new.error_sum)
+        self.abs_error_sum = np.insert(self.abs_error_sum, insert_at, new.abs_error_sum)
+        self.count = np.insert(self.count, insert_at, new.count)
+        self.cum_error = np.insert(self.cum_error, insert_at, cum_error)
+        self.cum_abs_error = np.insert(self.cum_abs_error, insert_at, cum_abs_error)
+        self.cum_count = np.insert(self.cum_count, insert_at, cum_count)
+
+        # Segment bookkeeping only shifts; the running sums stay valid
+        n = len(self.entity)
+        self.segment_starts = np.flatnonzero(np.r_[True, self.entity[1:] != self.entity[:-1]])
+        self.offsets = np.r_[self.segment_starts, n]
+        self.segment_start_of = np.repeat(self.segment_starts, np.diff(self.offsets))
+        self._keys = None
+
+        return new
+
+    def append_new_markers(self, path, horizon=None, batch_size=1_000_000):
+        """
+        Append the rows of a residuals table whose Marker is later than
+        last_marker, i.e. the newly observed markers of every Cycle that
+        forecast them. The Marker predicate is pushed down to the parquet
+        reader, so row groups of already indexed markers are skipped.
+        Returns the number of rows appended.
+        """
+
+        after = self.last_marker
+        if after is None:
+            raise ValueError("Index is empty; build it with from_parquet() first")
+
+        rows = 0
+        for batch in iter_parquet_batches(path, INDEX_COLUMNS, batch_size, filter=later_than_filter(path, 'Marker', after)):
+            batch = batch[to_epoch_seconds(batch['Marker']) > after]
+            if len(batch):
+                self.append(batch, horizon)
+                rows += len(batch)
+        return rows
+
+    def append_parquet(self, path, horizon=None, batch_size=1_000_000):
+        """
+        Append every row of a parquet file once; returns the number of rows
+        appended, or None if the file was already applied.
+        """
+
+        fingerprint = batch_fingerprint(path)
+        if fingerprint in self.sources:
+            return None
+
+        rows = 0
+        for batch in iter_parquet_batches(path, INDEX_COLUMNS, batch_size):
+            self.append(batch, horizon)
+            rows += len(batch)
+        self.sources.append(fingerprint)
+        return rows
+
+    def rolling(self, window, since=None):
+        """
+        Rolling MAE and bias per Entity over the last `window` markers.
+
+        Each value is computed from two running-sum lookups. With since
+        (epoch seconds), only markers at or after it are returned, so
+        refreshing after append() costs O(new markers).
+        """
+
+        positions = np.arange(len(self.entity))
+        if since is not None:
+            positions = positions[self.marker >= since]
+
+        prev = positions - window
+        has_prev = prev >= self.segment_start_of[positions]
+        prev = np.where(has_prev, prev, 0)
+
+        def window_sum(cum):
+            return cum[positions] - np.where(has_prev, cum[prev], 0)
+
+        count = window_sum(self.cum_count)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mae = window_sum(self.cum_abs_error) / count
+            bias = window_sum(self.cum_error) / count
+
+        return pd.DataFrame({
+            'Entity': self.entity[positions],
+            'Marker': self.marker[positions],
+            'window_markers': np.minimum(positions - self.segment_start_of[positions] + 1, window),
+            'window_rows': count,
+            'rolling_mae': mae,
+            'rolling_bias': bias,
+        })
+
+    def _composite_keys(self):
+        """
+        Sorted (Entity, Marker) keys packed into one int64 for binary search.
+        """
+
+        if self._keys is None:
+            self._base = int(self.marker.min()) if len(self.marker) else 0
+            self._span = int(self.marker.max()) - self._base + 2 if len(self.marker) else 1
+            if len(self.entities) * self._span >= 2**62:
+                raise ValueError("Marker span too large to pack with Entity into int64 keys")
+            entity_pos = np.repeat(np.arange(len(self.entities)), np.diff(self.offsets))
+            self._keys = entity_pos * self._span + (self.marker - self._base)
+        return self._keys
+
+    def window(self, start, end, entities=None):
+        """
+        Per (Entity, Marker) error aggregates with start <= Marker <= end
+        (epoch seconds or anything pd.Timestamp accepts), found by binary
+        search for every requested entity at once.
+        """
+
+        keys = self._composite_keys()
+        start = int(to_epoch_seconds([start])[0]) if not isinstance(start, (int, np.integer)) else int(start)
+        end = int(to_epoch_seconds([end])[0]) if not isinstance(end, (int, np.integer)) else int(end)
+
+        entity_pos = np.arange(len(self.entities))
+        if entities is not None:
+            entity_pos = np.searchsorted(self.entities, np.asarray(entities))
+            entity_pos = entity_pos[(entity_pos < len(self.entities))]
+            entity_pos = entity_pos[np.isin(self.entities[entity_pos], entities)]
+
+        lo_marker = np.clip(start - self._base, 0, self._span - 1)
+        hi_marker = np.clip(end - self._base, -1, self._span - 2)
+        lo = np.searchsorted(keys, entity_pos * self._span + lo_marker, side="left")
+        hi = np.searchsorted(keys, entity_pos * self._span + hi_marker, side="right")
+        if end < start:
+            hi = lo
+
+        lengths = np.maximum(hi - lo, 0)
+        idx = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(lo, lengths)
+
+        return pd.DataFrame({
+            'Entity': self.entity[idx],
+            'Marker': self.marker[idx],
+            'rows': self.count[idx],
+            'mae': self.abs_error_sum[idx] / self.count[idx],
+            'bias': self.error_sum[idx] / self.count[idx],
+        })
+
+def analyze_rolling_accuracy(data_dir="mock_data", window=4, table="residuals", index_path=None, append_path=None):
+    """
+    Print rolling per-Entity accuracy over the last `window` markers.
+
+    With index_path the index is loaded from disk and only rows of the
+    table with a Marker later than the indexed ones are appended (building
+    and saving it on first use); append_path folds in the rows of another
+    file, once.
+    """
+
+    print(f"ROLLING ACCURACY (last {window} markers per Entity)")
+    print("="*80)
+
+    path = resolve_table_path(data_dir, table)
+    index = None
+    if index_path is not None:
+        try:
+            index = MarkerTimeIndex.load(index_path)
+        except FileNotFoundError:
+            print(f"No index at {index_path}; building it")
+    if index is not None:
+        print(f"Loaded index from {index_path}")
+        rows = index.append_new_markers(path)
+        print(f"Appended {rows:,} rows from markers newer than the index")
+    else:
+        index = MarkerTimeIndex.from_parquet(path)
+
+    if append_path is not None:
+        rows = index.append_parquet(append_path)
+        print(f"{append_path} was already appended; index unchanged" if rows is None
+              else f"Appended {rows:,} rows from {append_path}")
+
+    if index_path is not None:
+        index.save(index_path)
+    rolling = index.rolling(window)
+    latest = rolling.groupby('Entity').tail(1)
+
+    print(f"Indexed (Entity, Marker) entries: {len(index.entity):,}")
+    print(f"Entities: {len(index.entities):,}")
+    print(f"Marker range: {pd.to_datetime(index.marker.min(), unit='s')} to {pd.to_datetime(index.marker.max(), unit='s')}")
+
+    print("\nLatest rolling MAE across entities:")
+    print(f"  Mean: {latest['rolling_mae'].mean():.4f}")
+    print(f"  Median: {latest['rolling_mae'].median():.4f}")
+    print(f"  Max: {latest['rolling_mae'].max():.4f}")
+
+    print("\nEntities with the highest latest rolling MAE:")
+    worst = latest.nlargest(10, 'rolling_mae').copy()
+    worst['Marker'] = pd.to_datetime(worst['Marker'], unit='s')
+    print(worst.to_string(index=False))
+
+    return index, rolling
+
+if __name__ == "__main__":
+    index, rolling = analyze_rolling_accuracy()
@@ -0,0 +1,246 @@
+import pandas as pd
+import numpy as np
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import struct
+import time
+from pathlib import Path
+from parquet_stream import resolve_table_path
+from create_relationship_diagram import RELATIONSHIPS, parse_relationship_keys
+
+STATE_FILE = "state.json"
+
+def read_footer(file_path):
+    """
+    Return the raw parquet footer (file metadata) bytes of a file.
+    """
+
+    with open(file_path, "rb") as f:
+        f.seek(-8, 2)
+        footer_len, magic = struct.unpack("<i4s", f.read(8))
+        if magic != b"PAR1":
+            raise ValueError(f"{file_path} is not a complete parquet file")
+        f.seek(-8 - footer_len, 2)
+        return f.read(footer_len)
+
+def fingerprint_table(path, previous=None):
+    """
+    Fingerprint a table file (or partitioned directory) by size, mtime and
+    a hash of its parquet footer(s).
+
+    The footer is only re-read for files whose size or mtime changed since
+    the previous fingerprint, so an unchanged data directory costs one
+    stat() per file.
+    """
+
+    path = Path(path)
+    files = sorted(path.glob("*.parquet")) if path.is_dir() else [path]
+    previous_files = (previous or {}).get('files', {})
+
+    entries = {}
+    for file_path in files:
+        stat = file_path.stat()
+        old = previous_files.get(file_path.name)
+        if old is not None and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+            entries[file_path.name] = old
+            continue
+        entries[file_path.name] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'footer_sha1': hashlib.sha1(read_footer(file_path)).hexdigest(),
+        }
+
+    # Content identity ignores mtime, so a touch without changes is a no-op
+    digest = hashlib.sha1()
+    for name, entry in entries.items():
+        digest.update(f"{name}:{entry['size']}:{entry['footer_sha1']};".encode())
+
+    return {'files': entries, 'digest': digest.hexdigest()}
+
+def profile_table(path):
+    """
+    Compact profile for tables without a dedicated analysis.
+    """
+
+    df = pd.read_parquet(path)
+    print(f"Table Shape: {df.shape}")
+    print(f"Null values: {int(df.isnull().sum().sum())}")
+    numeric = df.select_dtypes(include=[np.number])
+    if not numeric.empty:
+        print(numeric.describe().T.round(4).to_string())
+
+def reconcile_relationship(source_path, target_path, source_cols, target_cols):
+    """
+    Check referential coverage between two related tables on their keys.
+    """
+
+    source_keys = pd.read_parquet(source_path, columns=source_cols).drop_duplicates()
+    target_keys = pd.read_parquet(target_path, columns=target_cols).drop_duplicates()
+    source_keys.columns = target_cols
+
+    merged = target_keys.merge(source_keys, on=target_cols, how='outer', indicator=True)
+    counts = merged['_merge'].value_counts()
+
+    print(f"Join keys: {', '.join(source_cols)} -> {', '.join(target_cols)}")
+    print(f"Distinct source keys: {len(source_keys):,}")
+    print(f"Distinct target keys: {len(target_keys):,}")
+    print(f"Matched keys: {counts.get('both', 0):,}")
+    print(f"Target keys missing from source: {counts.get('left_only', 0):,}")
+    print(f"Source keys missing from target: {counts.get('right_only', 0):,}")
+
+def build_analyses():
+    """
+    Build the analysis registry: name -> (input tables, runner).
+
+    Every table gets a profile (the detailed analyze_* script where one
+    exists) and every relationship from the schema diagram gets a key
+    reconciliation, so e.g. a residuals change refreshes the
+    residuals -> stability reconciliation and an entity change refreshes
+    every entity enrichment join.
+    """
+
+    def detailed(module_name, function_name):
+        def run(data_dir):
+            module = importlib.import_module(module_name)
+            getattr(module, function_name)(data_dir)
+        return run
+
+    def generic_profile(table_name):
+        return lambda data_dir: profile_table(resolve_table_path(data_dir, table_name))
+
+    def relationship(source, target, key):
+        source_cols, target_cols = parse_relationship_keys(key)
+        def run(data_dir):
+            reconcile_relationship(
+                resolve_table_path(data_dir, source), resolve_table_path(data_dir, target),
+                source_cols, target_cols
+            )
+        return run
+
+    analyses = {
+        'profile:residuals': (('residuals',), detailed('analyze_residuals', 'analyze_residuals_table')),
+        'profile:entity': (('entity',), detailed('analyze_entity', 'analyze_entity_table')),
+        'profile:sku-colddirnks': (('sku-colddirnks',), detailed('analyze_sku_colddirnks', 'analyze_sku_colddirnks_table')),
+    }
+
+    tables = {table for source, target, _ in RELATIONSHIPS for table in (source, target)}
+    for table_name in sorted(tables):
+        analyses.setdefault(f"profile:{table_name}", ((table_name,), generic_profile(table_name)))
+
+    for source, target, key in RELATIONSHIPS:
+        kind = "enrich" if source == 'entity' else "reconcile"
+        analyses[f"{kind}:{source}->{target}"] = ((source, target), relationship(source, target, key))
+
+    return analyses
+
+def _load_state(store_dir):
+    state_path = Path(store_dir) / STATE_FILE
+    if state_path.exists():
+        return json.loads(state_path.read_text())
+    return {'fingerprints': {}, 'results': {}}
+
+def _save_state(store_dir, state):
+    state_path = Path(store_dir) / STATE_FILE
+    tmp_path = state_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state, indent=2, sort_keys=True))
+    tmp_path.replace(state_path)
+
+def refresh(data_dir="mock_data", store_dir=".watch_results", analyses=None):
+    """
+    Re-run only the analyses whose input tables changed since they last
+    ran, storing their output in store_dir. Returns (changed tables, names
+    of the analyses that ran).
+    """
+
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    analyses = analyses or build_analyses()
+    state = _load_state(store_dir)
+
+    # Fingerprint every table referenced by an analysis
+    fingerprints = {}
+    for table_name in sorted({t for inputs, _ in analyses.values() for t in inputs}):
+        try:
+            path = resolve_table_path(data_dir, table_name)
+            fingerprints[table_name] = fingerprint_table(path, state['fingerprints'].get(table_name))
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError):
+            # Still being written; pick it up on the next pass
+            if table_name in state['fingerprints']:
+                fingerprints[table_name] = state['fingerprints'][table_name]
+
+    changed = {
+        table_name for table_name, fp in fingerprints.items()
+        if state['fingerprints'].get(table_name, {}).get('digest') != fp['digest']
+    }
+
+    ran = []
+    for name, (inputs, run) in analyses.items():
+        if not all(table_name in fingerprints for table_name in inputs):
+            continue
+        # Skip analyses already run (successfully or not) on these exact inputs
+        current_inputs = {table_name: fingerprints[table_name]['digest'] for table_name in inputs}
+        previous = state['results'].get(name)
+        if previous is not None and previous['inputs'] == current_inputs:
+            continue
+
+        output = io.StringIO()
+        start = time.perf_counter()
+        status = 'ok'
+        with contextlib.redirect_stdout(output):
+            try:
+                run(data_dir)
+            except Exception as e:
+                status = 'error'
+                print(f"ERROR: {type(e).__name__}: {e}")
+        elapsed = time.perf_counter() - start
+
+        result_file = name.replace(":", "__").replace("->", "__to__") + ".txt"
+        (store_dir / result_file).write_text(output.getvalue())
+        state['results'][name] = {
+            'status': status,
+            'inputs': current_inputs,
+            'output_file': result_file,
+            'updated_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'seconds': round(elapsed, 3),
+        }
+        ran.append(name)
+
+    state['fingerprints'].update(fingerprints)
+    _save_state(store_dir, state)
+
+    return changed, ran
+
+def watch(data_dir="mock_data", store_dir=".watch_results", interval=2.0, once=False):
+    """
+    Poll the data directory and incrementally refresh analyses of tables
+    that changed.
+    """
+
+    print("WATCH MODE")
+    print("="*80)
+    print(f"Data directory: {data_dir}")
+    print(f"Result store: {store_dir}")
+
+    analyses = build_analyses()
+    try:
+        while True:
+            start = time.perf_counter()
+            changed, ran = refresh(data_dir, store_dir, analyses)
+            if ran:
+                print(f"\n[{time.strftime('%H:%M:%S')}] changed: {', '.join(sorted(changed)) or '(none)'}")
+                for name in ran:
+                    print(f"  refreshed {name}")
+                print(f"  {len(ran)}/{len(analyses)} analyses in {time.perf_counter() - start:.2f}s")
+            if once:
+                return changed, ran
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    watch()